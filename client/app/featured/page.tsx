@@ -47,7 +47,13 @@ export default function FeaturedGamesPage() {
         ? games.filter((game) => (game?.likes ?? 0) > 25)
         : games.filter((game) => (game?.likes ?? 0) <= 40)
 
+  const sendVote = (game: any, vote: "like" | "dislike" | null) => {
+    api.voteFeaturedGame(game.id, vote).catch((err) => setError(handleApiError(err)))
+  }
+
   const handleLike = (id: number) => {
+    const game = games.find((game) => game.id === id)
+    if (game) sendVote(game, game.userLiked ? null : "like")
     setGames(
       games.map((game) => {
         if (game.id === id) {
@@ -74,6 +80,8 @@ export default function FeaturedGamesPage() {
   }
 
   const handleDislike = (id: number) => {
+    const game = games.find((game) => game.id === id)
+    if (game) sendVote(game, game.userDisliked ? null : "dislike")
     setGames(
       games.map((game) => {
         if (game.id === id) {
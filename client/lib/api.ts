@@ -17,6 +17,11 @@ const CACHE_KEYS = {
   LEADERBOARD: "chess_tournament_leaderboard",
 };
 
+type FeaturedVote = "like" | "dislike" | null;
+
+// Largest page /featured/games/ serves
+const FEATURED_PAGE_SIZE = 200;
+
 // Cache interface
 interface CacheItem<T> {
   data: T;
@@ -125,13 +130,30 @@ export const api = {
       return cache.data;
     }
 
-    const res = await axiosinstance.get("/featured/games/");
-    const data = res.data;
-    const games = Array.isArray(data?.featured_games) ? data.featured_games : [];
+    // The endpoint is paged; follow next_cursor until every game is loaded.
+    // Cookies carry this visitor's votes (userLiked/userDisliked).
+    const games: FeaturedGame[] = [];
+    let cursor: string | null = null;
+    do {
+      const res = await axiosinstance.get("/featured/games/", {
+        params: cursor ? { limit: FEATURED_PAGE_SIZE, cursor } : { limit: FEATURED_PAGE_SIZE },
+        withCredentials: true,
+      });
+      const data = res.data;
+      if (Array.isArray(data?.featured_games)) games.push(...data.featured_games);
+      cursor = data?.next_cursor ?? null;
+    } while (cursor);
     setCache(CACHE_KEYS.FEATURED_GAMES, games);
     return games;
   },
 
+  // Set this visitor's vote on a featured game: "like", "dislike" or null to withdraw it
+  voteFeaturedGame: async (id: number, vote: FeaturedVote) => {
+    const res = await axiosinstance.post(`/featured/games/${id}/vote/`, { vote }, { withCredentials: true });
+    localStorage.removeItem(CACHE_KEYS.FEATURED_GAMES);
+    return res.data as { id: number; likes: number; dislikes: number; vote: FeaturedVote };
+  },
+
   // Get leaderboard data
   getLeaderboard: async () => {
     const cache = isCacheValid<any>(CACHE_KEYS.LEADERBOARD);
@@ -0,0 +1,97 @@
+"""
+Per-request performance instrumentation.
+
+PerformanceMiddleware times DB queries through connection execute wrappers.
+Code can add its own timings with ``span()``, and the outbound Chess.com
+client does so for every request it makes. Totals are sent back as
+a ``Server-Timing`` header and logged as one JSON line on the
+``chess_tournament.perf`` logger. Only a PERF_SAMPLE_RATE fraction of
+requests is instrumented.
+"""
+
+import contextvars
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("chess_tournament.perf")
+
+_recorder = contextvars.ContextVar("perf_recorder", default=None)
+
+
+class Recorder:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def add(self, name, seconds, count=1):
+        with self.lock:
+            total, calls = self.metrics.get(name, (0.0, 0))
+            self.metrics[name] = (total + seconds, calls + count)
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add("db", time.perf_counter() - started)
+
+
+@contextmanager
+def span(name):
+    """Time the enclosed block under ``name`` when the request is being sampled."""
+    recorder = _recorder.get()
+    if recorder is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.add(name, time.perf_counter() - started)
+
+
+def server_timing(metrics, total):
+    entries = [f"{name};dur={seconds * 1000:.1f};desc=\"{calls}\"" for name, (seconds, calls) in metrics.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class PerformanceMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.PERF_SAMPLE_RATE:
+            return self.get_response(request)
+
+        recorder = Recorder()
+        token = _recorder.set(recorder)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(recorder.db_wrapper))
+                response = self.get_response(request)
+        finally:
+            _recorder.reset(token)
+        total = time.perf_counter() - started
+
+        # Streaming responses only cover the time to the first byte here.
+        response["Server-Timing"] = server_timing(recorder.metrics, total)
+        logger.info(json.dumps({
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(total * 1000, 1),
+            **{
+                name: {"ms": round(seconds * 1000, 1), "count": calls}
+                for name, (seconds, calls) in recorder.metrics.items()
+            },
+        }))
+        return response
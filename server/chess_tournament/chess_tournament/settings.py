@@ -63,6 +63,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'chess_tournament.instrumentation.PerformanceMiddleware',
 ]
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
@@ -94,6 +95,91 @@ DATABASES = {
    'default': dj_database_url.config(default=os.environ.get("DATABASE_URL"))
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Set REDIS_URL so every gunicorn worker shares one cache; otherwise each
+# process keeps its own LRU-bounded in-memory cache.
+
+REDIS_URL = os.environ.get("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+        'chesscom': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'chesscom',
+        },
+        'chesscom_archives': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'chesscom-archives',
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'default',
+        },
+        'chesscom': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'chesscom',
+            'OPTIONS': {'MAX_ENTRIES': int(os.environ.get("CHESSCOM_CACHE_MAX_ENTRIES", 2000))},
+        },
+        # Monthly game archives can be several MB each, so they get their own, much smaller bound.
+        'chesscom_archives': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'chesscom_archives',
+            'OPTIONS': {'MAX_ENTRIES': int(os.environ.get("CHESSCOM_ARCHIVE_CACHE_MAX_ENTRIES", 50))},
+        },
+    }
+
+# Live leaderboard pub/sub. The in-memory backend only reaches clients
+# connected to the same process; Redis fans out across workers.
+LEADERBOARD_PUBSUB_BACKEND = os.environ.get(
+    "LEADERBOARD_PUBSUB_BACKEND",
+    'leaderboard.pubsub.RedisBackend' if REDIS_URL else 'leaderboard.pubsub.InMemoryBackend',
+)
+
+# Seconds a cached Chess.com response stays fresh, per endpoint. Closed
+# monthly archives never change, but the opening index reads each one once
+# and drops it from the cache, so they are not kept for long either way.
+CHESSCOM_CACHE_TTL = {
+    'stats': 300,
+    'archives': 3600,
+    'current_month': 600,
+    'closed_month': 24 * 3600,
+    'default': 300,
+}
+
+# Seconds a stale response is kept after its TTL so it can be revalidated
+# with If-None-Match/If-Modified-Since instead of downloaded again.
+CHESSCOM_CACHE_RETENTION = 7 * 24 * 3600
+
+# Chess.com API client
+CHESSCOM_API_ROOT = os.environ.get("CHESSCOM_API_ROOT", "https://api.chess.com/pub")
+CHESSCOM_USER_AGENT = os.environ.get("CHESSCOM_USER_AGENT", "mechess/1.0 (+https://github.com/SinlessRook/Mechess)")
+CHESSCOM_CONCURRENCY = int(os.environ.get("CHESSCOM_CONCURRENCY", 8))
+CHESSCOM_RATE_LIMIT = float(os.environ.get("CHESSCOM_RATE_LIMIT", 10))  # requests per second per host
+CHESSCOM_STATS_MAX_AGE = int(os.environ.get("CHESSCOM_STATS_MAX_AGE", 1800))  # seconds before stored stats count as stale
+CHESSCOM_REQUEST_DEADLINE = float(os.environ.get("CHESSCOM_REQUEST_DEADLINE", 1.0))  # max seconds a request waits for missing stats
+CHESSCOM_ARCHIVE_DEADLINE = float(os.environ.get("CHESSCOM_ARCHIVE_DEADLINE", 5.0))  # max seconds a request waits for game archives
+CHESSCOM_CONNECT_TIMEOUT = float(os.environ.get("CHESSCOM_CONNECT_TIMEOUT", 3.0))
+CHESSCOM_READ_TIMEOUT = float(os.environ.get("CHESSCOM_READ_TIMEOUT", 5.0))
+CHESSCOM_MAX_RETRIES = int(os.environ.get("CHESSCOM_MAX_RETRIES", 3))
+CHESSCOM_BACKOFF_BASE = float(os.environ.get("CHESSCOM_BACKOFF_BASE", 0.5))  # seconds, doubled per attempt
+CHESSCOM_BACKOFF_MAX = float(os.environ.get("CHESSCOM_BACKOFF_MAX", 8.0))  # longest wait before giving up on a request
+CHESSCOM_BREAKER_THRESHOLD = int(os.environ.get("CHESSCOM_BREAKER_THRESHOLD", 5))  # consecutive failures that open the breaker
+CHESSCOM_BREAKER_RESET = float(os.environ.get("CHESSCOM_BREAKER_RESET", 30.0))  # seconds open before a trial request
+
+# "chesscom" shows Chess.com ratings; "local" uses Glicko-2 ratings computed
+# from the games stored here, so the leaderboard makes no outbound calls.
+RATING_SOURCE = os.environ.get("RATING_SOURCE", "chesscom")
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -134,4 +220,39 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
-CORS_ALLOW_ALL_ORIGINS  = True
+# Seconds to wait after a game write before recomputing ratings and standings,
+# so bursts of writes (e.g. deleting a round) are handled together.
+LEADERBOARD_UPDATE_DELAY = float(os.environ.get("LEADERBOARD_UPDATE_DELAY", 0.5))
+
+# Featured game votes are buffered per process and written out in batches.
+FEATURED_VOTE_FLUSH_INTERVAL = float(os.environ.get("FEATURED_VOTE_FLUSH_INTERVAL", 5.0))  # seconds a vote may wait
+FEATURED_VOTE_FLUSH_THRESHOLD = int(os.environ.get("FEATURED_VOTE_FLUSH_THRESHOLD", 500))  # buffered votes that force a flush
+
+# Only the API is shared cross-origin; the admin never gets CORS headers.
+CORS_URLS_REGEX = r"^/(players|leaderboard|featured)/"
+# Client origins trusted with credentials (comma separated). Listing them is
+# what lets a client on another site send the featured-vote cookie; without
+# them any origin may read the API, but never with cookies.
+CORS_ALLOWED_ORIGINS = [origin for origin in os.environ.get("CORS_ALLOWED_ORIGINS", "").split(",") if origin]
+CORS_ALLOW_ALL_ORIGINS = not CORS_ALLOWED_ORIGINS
+CORS_ALLOW_CREDENTIALS = bool(CORS_ALLOWED_ORIGINS)
+# "None" (HTTPS only) is needed when the client is served from another site.
+FEATURED_VOTE_COOKIE_SAMESITE = os.environ.get("FEATURED_VOTE_COOKIE_SAMESITE", "None" if CORS_ALLOWED_ORIGINS else "Lax")
+CORS_EXPOSE_HEADERS = ['Server-Timing', 'ETag', 'X-Next-Cursor']
+
+# Fraction of requests that get Server-Timing headers and a perf log line.
+PERF_SAMPLE_RATE = float(os.getenv('PERF_SAMPLE_RATE', '1.0' if DEBUG else '0.05'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'chess_tournament.perf': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+        'players.resilience': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+        'leaderboard.updates': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+        'featured_games.votes': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
@@ -0,0 +1,64 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from featured_games.models import Game
+from featured_games.queries import player_games_or, recent_player_games
+from leaderboard.models import Tournament
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+class Command(BaseCommand):
+    help = 'Print query plans and timings for the Game lookups used by player pages and the leaderboard'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--player', type=int, help='Player id (defaults to the player with most white games)')
+        parser.add_argument('--tournament', type=int, help='Tournament id (defaults to the active tournament)')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--no-plans', action='store_true', help='Only print timings')
+
+    def handle(self, *args, **options):
+        player_id = options['player'] or (
+            Game.objects.values('ply1').annotate(n=Count('id')).order_by('-n').values_list('ply1', flat=True).first()
+        )
+        tournament = (
+            Tournament.objects.filter(id=options['tournament']).first() if options['tournament']
+            else Tournament.objects.filter(currently_active=True).first()
+        )
+        if player_id is None or tournament is None:
+            raise CommandError('Seed some games first, e.g. manage.py seed_database --games 1000000')
+
+        lookups = [
+            ('recent games, OR across colours',
+             player_games_or(player_id).order_by('-id')[:6],
+             lambda: list(player_games_or(player_id).select_related('ply1', 'ply2', 'tournament').order_by('-id')[:6])),
+            ('recent games, one query per colour',
+             Game.objects.filter(ply1=player_id).order_by('-id')[:6],
+             lambda: recent_player_games(player_id, 6)),
+            ('tournament games by round',
+             Game.objects.filter(tournament=tournament).order_by('round', 'id'),
+             lambda: list(Game.objects.filter(tournament=tournament).order_by('round', 'id')
+                          .values_list('round', 'ply1_id', 'ply2_id', 'result'))),
+            ('tournaments played, per colour',
+             Game.objects.filter(ply1_id__in=[player_id], tournament__isnull=False)
+             .values_list('ply1_id', 'tournament__name').distinct(),
+             lambda: [list(Game.objects.filter(**{f'{field}__in': [player_id]}, tournament__isnull=False)
+                           .values_list(field, 'tournament__name').distinct())
+                      for field in ('ply1_id', 'ply2_id')]),
+        ]
+
+        self.stdout.write(f'{Game.objects.count()} games; player {player_id}; tournament {tournament.id}')
+        for label, queryset, run in lookups:
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            if not options['no_plans']:
+                self.stdout.write(queryset.explain())
+            self.stdout.write(f'median {timed(run, options["repeat"]):.2f} ms over {options["repeat"]} runs')
@@ -0,0 +1,179 @@
+import gzip
+import re
+import sys
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from featured_games.models import Game
+from leaderboard.live import rebuild_and_publish
+from leaderboard.models import Tournament
+from leaderboard.ratings import update_ratings
+from players.models import Player
+from players.pgn import iter_headers
+
+RESULTS = {'1-0', '0-1', '1/2-1/2'}
+ROUND_RE = re.compile(r'\d+')
+
+
+def open_pgn(path):
+    if path == '-':
+        return sys.stdin
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, encoding='utf-8', errors='replace')
+
+
+def parse_round(value):
+    # "3", "3.1" (round 3, board 1) or "?" when unknown.
+    match = ROUND_RE.match(value)
+    return int(match.group()) if match else 1
+
+
+def game_link(headers):
+    link = headers.link.strip()
+    return link if link.startswith('http') and len(link) <= 200 else None
+
+
+def chess_id_for(name):
+    return re.sub(r'\W+', '_', name.strip()).strip('_').lower()[:50] or 'player'
+
+
+class Command(BaseCommand):
+    help = 'Import games from a PGN file (use - for stdin, .gz is read compressed)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--tournament', type=int,
+                            help='Put every game in this tournament; by default games go to the tournament '
+                                 'named by their Event tag, which is created if needed')
+        parser.add_argument('--create-players', action='store_true',
+                            help='Create players that match no chess_id or name instead of skipping their games')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        # One query loads every player; chess_id matches win over name matches.
+        rows = list(Player.objects.values_list('id', 'chess_id', 'name'))
+        self.players = {name.lower(): player_id for player_id, _, name in reversed(rows)}
+        self.players.update((chess_id.lower(), player_id) for player_id, chess_id, _ in rows)
+        self.chess_ids = {chess_id for _, chess_id, _ in rows}
+
+        self.tournaments = {}
+        if options['tournament']:
+            tournament = Tournament.objects.filter(id=options['tournament']).first()
+            if tournament is None:
+                raise CommandError('Tournament not found')
+            self.fixed_tournament = tournament.id
+        else:
+            self.fixed_tournament = None
+            self.tournaments = {name: tid for tid, name in Tournament.objects.values_list('id', 'name')}
+
+        self.create_players = options['create_players']
+        self.created_players = 0
+        self.skipped = 0
+        self.duplicates = 0
+        self.imported = 0
+        self.periods = {}
+        self.started = time.monotonic()
+
+        batch = []
+        with open_pgn(options['path']) as lines:
+            for headers in iter_headers(lines):
+                batch.append(headers)
+                if len(batch) >= options['batch_size']:
+                    self.flush(batch)
+                    batch = []
+        self.flush(batch)
+        elapsed = time.monotonic() - self.started
+
+        if self.periods:
+            update_ratings(min(self.periods.items()))
+            for tournament in Tournament.objects.filter(id__in=self.periods):
+                rebuild_and_publish(tournament, from_round=self.periods[tournament.id])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Imported {self.imported} games ({self.skipped} skipped, {self.duplicates} duplicates, '
+            f'{self.created_players} players created) '
+            f'in {elapsed:.1f}s, {self.imported / max(elapsed, 1e-9):,.0f} games/s'
+        ))
+
+    def player_id(self, name, missing):
+        key = name.strip().lower()
+        if not key or key == '?':
+            return None
+        player_id = self.players.get(key)
+        if player_id is None and self.create_players:
+            missing.setdefault(key, name.strip())
+        return player_id
+
+    def tournament_id(self, event):
+        if self.fixed_tournament is not None:
+            return self.fixed_tournament
+        name = event.strip()[:100] or 'Imported games'
+        if name not in self.tournaments:
+            self.tournaments[name] = Tournament.objects.create(name=name, currently_active=False).id
+        return self.tournaments[name]
+
+    def create_missing(self, missing):
+        players = []
+        for name in missing.values():
+            chess_id = base = chess_id_for(name)
+            suffix = 1
+            while chess_id in self.chess_ids:
+                suffix += 1
+                chess_id = f'{base[:45]}_{suffix}'
+            self.chess_ids.add(chess_id)
+            players.append(Player(name=name[:100], chess_id=chess_id, player_class='Beginner'))
+        for key, player in zip(missing, Player.objects.bulk_create(players)):
+            self.players[key] = player.id
+        self.created_players += len(players)
+
+    def flush(self, batch):
+        if not batch:
+            return
+        # Games with a link are imported once, so a file can be re-run or overlap an earlier import.
+        links = {game_link(headers) for headers in batch} - {None}
+        seen = set(Game.objects.filter(link__in=links).values_list('link', flat=True)) if links else set()
+
+        missing = {}
+        for headers in batch:
+            if game_link(headers) not in seen:
+                self.player_id(headers.white, missing)
+                self.player_id(headers.black, missing)
+
+        games = []
+        with transaction.atomic():
+            if missing:
+                self.create_missing(missing)
+            for headers in batch:
+                link = game_link(headers)
+                if link in seen:
+                    self.duplicates += 1
+                    continue
+                white = self.player_id(headers.white, {})
+                black = self.player_id(headers.black, {})
+                if white is None or black is None or white == black:
+                    self.skipped += 1
+                    continue
+                if link is not None:
+                    seen.add(link)
+                tournament_id = self.tournament_id(headers.event)
+                round_id = parse_round(headers.round)
+                self.periods[tournament_id] = min(round_id, self.periods.get(tournament_id, round_id))
+                games.append(Game(
+                    ply1_id=white,
+                    ply2_id=black,
+                    tournament_id=tournament_id,
+                    round=round_id,
+                    result=headers.result if headers.result in RESULTS else None,
+                    link=link,
+                ))
+            # bulk_create skips the Game signals; ratings and standings are rebuilt once at the end.
+            Game.objects.bulk_create(games)
+        self.imported += len(games)
+
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(
+            f'{self.imported + self.skipped + self.duplicates} games read, {self.imported} imported, '
+            f'{self.imported / max(elapsed, 1e-9):,.0f} games/s'
+        )
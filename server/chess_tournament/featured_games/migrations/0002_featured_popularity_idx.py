@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('featured_games', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='featured',
+            index=models.Index(fields=['-like', '-id'], name='featured_popularity_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('featured_games', '0002_featured_popularity_idx'),
+        ('leaderboard', '0002_standing'),
+        ('players', '0003_openingstat_openingindex'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['tournament', 'round', 'id'], name='game_tournament_round_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['ply1', '-id'], name='game_white_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['ply2', '-id'], name='game_black_recent_idx'),
+        ),
+    ]
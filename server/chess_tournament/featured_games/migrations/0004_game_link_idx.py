@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('featured_games', '0003_game_indexes'),
+        ('leaderboard', '0006_bye'),
+        ('players', '0003_openingstat_openingindex'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['link'], name='game_link_idx'),
+        ),
+    ]
@@ -12,6 +12,14 @@ class Game(models.Model):
     result = models.CharField(max_length=7, choices=RESULT_CHOICES,null=True, blank=True)
     link = models.URLField(max_length=200, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['tournament', 'round', 'id'], name='game_tournament_round_idx'),
+            models.Index(fields=['ply1', '-id'], name='game_white_recent_idx'),
+            models.Index(fields=['ply2', '-id'], name='game_black_recent_idx'),
+            models.Index(fields=['link'], name='game_link_idx'),
+        ]
+
     def __str__(self):
         return f"{self.ply1.name} vs {self.ply2.name} ({self.result})"
 
@@ -20,6 +28,9 @@ class Featured(models.Model):
     like = models.PositiveIntegerField(default=0)
     dislike = models.PositiveIntegerField(default=0)
 
+    class Meta:
+        indexes = [models.Index(fields=['-like', '-id'], name='featured_popularity_idx')]
+
     def clean(self):
         if not self.game or not self.game.link:
             raise ValidationError("The selected game must have a valid link to be featured.")
@@ -0,0 +1,19 @@
+from django.db.models import Q
+from .models import Game
+
+
+def player_games_or(player_id):
+    """The original single-query lookup, kept for plan comparisons."""
+    return Game.objects.filter(Q(ply1=player_id) | Q(ply2=player_id))
+
+
+def recent_player_games(player_id, limit):
+    """Return a player's latest games as two index-backed queries merged in Python.
+
+    ``Q(ply1=...) | Q(ply2=...)`` cannot use either per-colour index for
+    ORDER BY id DESC LIMIT, so each colour is read from its own index.
+    """
+    base = Game.objects.select_related("ply1", "ply2", "tournament").order_by("-id")
+    games = {game.id: game for game in base.filter(ply1=player_id)[:limit]}
+    games.update((game.id, game) for game in base.filter(ply2=player_id)[:limit])
+    return sorted(games.values(), key=lambda game: game.id, reverse=True)[:limit]
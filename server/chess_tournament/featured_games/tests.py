@@ -1,3 +1,308 @@
-from django.test import TestCase
+import gzip
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection
+from django.db.models import QuerySet
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
-# Create your tests here.
+from leaderboard.models import Standing, Tournament
+from players.models import Player
+from . import views, votes
+from .models import Featured, Game
+
+
+def make_featured(count, like=0, dislike=0):
+    white, black = Player.objects.bulk_create([
+        Player(name='White', chess_id='white', player_class='Beginner'),
+        Player(name='Black', chess_id='black', player_class='Beginner'),
+    ])
+    games = Game.objects.bulk_create(
+        Game(ply1=white, ply2=black, result='1-0', link=f'https://www.chess.com/game/live/{i}')
+        for i in range(count)
+    )
+    return Featured.objects.bulk_create(Featured(game=game, like=like, dislike=dislike) for game in games)
+
+
+def discard_buffer():
+    with votes._lock:
+        if votes._timer is not None:
+            votes._timer.cancel()
+            votes._timer = None
+        votes._pending.clear()
+        votes._buffered = 0
+
+
+@override_settings(FEATURED_VOTE_FLUSH_INTERVAL=60, FEATURED_VOTE_FLUSH_THRESHOLD=1000)
+class VoteBufferTests(TestCase):
+    def setUp(self):
+        discard_buffer()
+        self.addCleanup(discard_buffer)
+        self.featured = make_featured(3, like=5, dislike=5)
+
+    def counts(self, featured):
+        featured.refresh_from_db()
+        return featured.like, featured.dislike
+
+    def test_votes_wait_in_the_buffer_until_flushed(self):
+        first = self.featured[0]
+        votes.record_vote(first.id, 'like')
+        votes.record_vote(first.id, 'like')
+        votes.record_vote(first.id, 'dislike', previous='like')
+
+        self.assertEqual(self.counts(first), (5, 5))
+        self.assertEqual(votes.pending_votes(), {first.id: (1, 1)})
+        self.assertEqual(votes.totals(first, votes.pending_votes([first.id])), (6, 6))
+        self.assertIsNotNone(votes._timer)
+
+        self.assertEqual(votes.flush_votes(), 1)
+        self.assertEqual(self.counts(first), (6, 6))
+        self.assertEqual(votes.pending_votes(), {})
+        self.assertIsNone(votes._timer)
+
+    def test_flush_writes_one_update_per_distinct_delta(self):
+        for featured in self.featured:
+            votes.record_vote(featured.id, 'like')
+        votes.record_vote(self.featured[2].id, 'like')
+
+        with CaptureQueriesContext(connection) as queries:
+            votes.flush_votes()
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 2)
+        self.assertEqual([self.counts(f) for f in self.featured], [(6, 5), (6, 5), (7, 5)])
+
+    def test_counts_never_drop_below_zero(self):
+        empty = self.featured[0]
+        Featured.objects.filter(pk=empty.pk).update(like=0)
+        votes.record_vote(empty.id, None, previous='like')
+        votes.flush_votes()
+        self.assertEqual(self.counts(empty), (0, 5))
+
+    @override_settings(FEATURED_VOTE_FLUSH_THRESHOLD=3)
+    def test_reaching_the_threshold_flushes_inline(self):
+        featured = self.featured[0]
+        votes.record_vote(featured.id, 'like')
+        votes.record_vote(featured.id, 'like')
+        self.assertEqual(self.counts(featured), (5, 5))
+        votes.record_vote(featured.id, 'dislike')
+        self.assertEqual(self.counts(featured), (7, 6))
+        self.assertEqual(votes.buffered_votes(), 0)
+
+    @override_settings(FEATURED_VOTE_FLUSH_THRESHOLD=3)
+    def test_failed_flush_keeps_every_vote_and_logs(self):
+        featured = self.featured[0]
+        votes.record_vote(featured.id, 'like')
+        votes.record_vote(featured.id, 'like')
+        with patch.object(QuerySet, 'update', side_effect=DatabaseError('down')), \
+                self.assertLogs('featured_games.votes', 'ERROR') as logs:
+            votes.record_vote(featured.id, 'like')
+        self.assertIn('3 kept in the buffer', logs.output[0])
+        self.assertEqual(votes.buffered_votes(), 3)
+        self.assertEqual(votes.pending_votes(), {featured.id: (3, 0)})
+        self.assertIsNotNone(votes._timer)
+        self.assertEqual(self.counts(featured), (5, 5))
+
+        votes.flush_votes()
+        self.assertEqual(self.counts(featured), (8, 5))
+        self.assertEqual(votes.buffered_votes(), 0)
+
+    def test_background_flush_logs_failures(self):
+        votes.record_vote(self.featured[0].id, 'like')
+        with patch.object(QuerySet, 'update', side_effect=DatabaseError('down')), \
+                patch.object(votes.connections, 'close_all'), \
+                self.assertLogs('featured_games.votes', 'ERROR'):
+            votes.flush_in_background()
+        self.assertEqual(votes.buffered_votes(), 1)
+
+
+@override_settings(FEATURED_VOTE_FLUSH_INTERVAL=60, FEATURED_VOTE_FLUSH_THRESHOLD=1000)
+class VoteEndpointTests(TestCase):
+    def setUp(self):
+        discard_buffer()
+        self.addCleanup(discard_buffer)
+        self.featured = make_featured(2, like=5, dislike=5)[0]
+        self.url = f'/featured/games/{self.featured.id}/vote/'
+
+    def vote(self, vote, client=None, **extra):
+        return (client or self.client).post(self.url, {'vote': vote, **extra}, content_type='application/json')
+
+    def my_flags(self, client=None):
+        games = (client or self.client).get('/featured/games/').json()['featured_games']
+        game = next(game for game in games if game['id'] == self.featured.id)
+        return game['userLiked'], game['userDisliked']
+
+    def test_repeating_a_vote_counts_once(self):
+        self.assertEqual(self.vote('like').json()['likes'], 6)
+        self.assertEqual(self.vote('like').json()['likes'], 6)
+        self.assertEqual(votes.pending_votes(), {self.featured.id: (1, 0)})
+        self.assertEqual(self.my_flags(), (True, False))
+
+    def test_switching_and_withdrawing(self):
+        self.vote('like')
+        response = self.vote('dislike').json()
+        self.assertEqual((response['likes'], response['dislikes']), (5, 6))
+        self.assertEqual(self.my_flags(), (False, True))
+
+        response = self.vote(None).json()
+        self.assertEqual((response['likes'], response['dislikes']), (5, 5))
+        self.assertEqual(self.my_flags(), (False, False))
+
+    def test_withdrawing_a_vote_never_cast_changes_nothing(self):
+        response = self.vote(None, previous='like').json()
+        self.assertEqual((response['likes'], response['dislikes']), (5, 5))
+        self.vote('dislike', previous='like')
+        self.assertEqual(votes.pending_votes(), {self.featured.id: (0, 1)})
+
+    def test_each_visitor_has_its_own_vote(self):
+        other = self.client_class()
+        self.vote('like')
+        self.assertEqual(self.vote('like', client=other).json()['likes'], 7)
+        self.vote(None, client=other)
+        self.assertEqual(self.my_flags(), (True, False))
+        self.assertEqual(self.my_flags(other), (False, False))
+        self.assertEqual(self.my_flags(self.client_class()), (False, False))
+
+    def test_voting_only_reads_the_featured_row(self):
+        self.vote('like')
+        with self.assertNumQueries(1):
+            self.vote('dislike')
+        self.assertEqual(self.counts(), (5, 5))
+
+    def test_tampered_cookie_is_ignored(self):
+        self.vote('like')
+        self.client.cookies[views.VOTE_COOKIE] = f'{self.featured.id}d:forged'
+        self.assertEqual(self.my_flags(), (False, False))
+        self.assertEqual(self.vote('like').json()['likes'], 7)
+
+    def test_cookie_keeps_only_the_latest_votes(self):
+        with patch.object(views, 'MAX_COOKIE_VOTES', 1):
+            other = Featured.objects.exclude(pk=self.featured.pk).get()
+            self.vote('like')
+            self.client.post(f'/featured/games/{other.id}/vote/', {'vote': 'like'}, content_type='application/json')
+        self.assertEqual(views.read_votes(self.cookie_request()), {other.id: 'like'})
+
+    def cookie_request(self):
+        request = RequestFactory().get('/')
+        request.COOKIES = {key: morsel.value for key, morsel in self.client.cookies.items()}
+        return request
+
+    def counts(self):
+        self.featured.refresh_from_db()
+        return self.featured.like, self.featured.dislike
+
+    def test_rejects_bad_votes_and_unknown_games(self):
+        self.assertEqual(self.vote('love').status_code, 400)
+        missing = self.client.post('/featured/games/999999/vote/', {'vote': 'like'}, content_type='application/json')
+        self.assertEqual(missing.status_code, 404)
+        self.assertEqual(votes.pending_votes(), {})
+
+
+def pgn_game(white, black, result='1-0', event='Club Open', round_id='1', link=None):
+    tags = [('Event', event), ('Round', round_id), ('White', white), ('Black', black), ('Result', result)]
+    if link:
+        tags.append(('Link', link))
+    return '\n'.join(f'[{name} "{value}"]' for name, value in tags) + f'\n\n1. e4 e5 {result}\n\n'
+
+
+class ImportPgnTests(TestCase):
+    def setUp(self):
+        Player.objects.bulk_create([
+            Player(name='Alice Smith', chess_id='alice', player_class='Beginner'),
+            Player(name='Bob Jones', chess_id='bob', player_class='Beginner'),
+            Player(name='Carol', chess_id='carol', player_class='Beginner'),
+        ])
+
+    def import_pgn(self, text, *args, suffix='.pgn'):
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        with (gzip.open if suffix.endswith('.gz') else open)(path, 'wt', encoding='utf-8') as f:
+            f.write(text)
+        out = StringIO()
+        call_command('import_pgn', path, *args, stdout=out)
+        return out.getvalue()
+
+    def games(self):
+        return list(Game.objects.order_by('id').values_list(
+            'ply1__chess_id', 'ply2__chess_id', 'tournament__name', 'round', 'result'))
+
+    def test_players_match_by_chess_id_or_name(self):
+        self.import_pgn(
+            pgn_game('alice', 'Bob Jones', round_id='2.3')
+            + pgn_game('BOB', 'carol', result='1/2-1/2', round_id='?')
+        )
+        self.assertEqual(self.games(), [
+            ('alice', 'bob', 'Club Open', 2, '1-0'),
+            ('bob', 'carol', 'Club Open', 1, '1/2-1/2'),
+        ])
+        tournament = Tournament.objects.get(name='Club Open')
+        self.assertFalse(tournament.currently_active)
+        self.assertEqual(Standing.objects.filter(tournament=tournament, round=2).count(), 3)
+
+    def test_unfinished_games_have_no_result(self):
+        self.import_pgn(pgn_game('alice', 'bob', result='*') + pgn_game('alice', 'carol', result='2-0'))
+        self.assertEqual([game[4] for game in self.games()], [None, None])
+
+    def test_unknown_and_malformed_players_are_skipped(self):
+        out = self.import_pgn(
+            pgn_game('alice', 'Stranger')
+            + pgn_game('?', 'bob')
+            + pgn_game('carol', 'Carol')  # the same player on both sides
+            + '[White "alice"]\n[Black bob]\n\n1. e4 *\n\n'  # malformed Black tag
+            + pgn_game('alice', 'bob')
+        )
+        self.assertEqual(self.games(), [('alice', 'bob', 'Club Open', 1, '1-0')])
+        self.assertIn('Imported 1 games (4 skipped, 0 duplicates, 0 players created)', out)
+
+    def test_create_players(self):
+        out = self.import_pgn(
+            pgn_game('Stranger Danger', 'alice') + pgn_game('stranger danger', 'Dr. Who?'),
+            '--create-players',
+        )
+        self.assertIn('Imported 2 games (0 skipped, 0 duplicates, 2 players created)', out)
+        self.assertEqual(self.games(), [
+            ('stranger_danger', 'alice', 'Club Open', 1, '1-0'),
+            ('stranger_danger', 'dr_who', 'Club Open', 1, '1-0'),
+        ])
+
+    def test_duplicate_links_are_imported_once(self):
+        first = pgn_game('alice', 'bob', link='https://www.chess.com/game/live/1')
+        second = pgn_game('bob', 'carol', link='https://www.chess.com/game/live/2')
+        out = self.import_pgn(first + first + second, '--batch-size', '2')
+        self.assertIn('Imported 2 games (0 skipped, 1 duplicates', out)
+
+        out = self.import_pgn(first + second + pgn_game('carol', 'alice'), suffix='.pgn.gz')
+        self.assertIn('Imported 1 games (0 skipped, 2 duplicates', out)
+        self.assertEqual(Game.objects.count(), 3)
+        self.assertEqual(Game.objects.filter(link__isnull=True).count(), 1)
+
+    def test_fixed_tournament(self):
+        tournament = Tournament.objects.create(name='Spring', currently_active=False)
+        self.import_pgn(pgn_game('alice', 'bob', event='Ignored'), '--tournament', str(tournament.id))
+        self.assertEqual([game[2] for game in self.games()], ['Spring'])
+        self.assertFalse(Tournament.objects.filter(name='Ignored').exists())
+        with self.assertRaisesMessage(CommandError, 'Tournament not found'):
+            self.import_pgn(pgn_game('alice', 'bob'), '--tournament', '999999')
+
+
+class CorsTests(TestCase):
+    def test_admin_never_gets_cors_headers(self):
+        response = self.client.get('/admin/login/', HTTP_ORIGIN='https://evil.example')
+        self.assertNotIn('Access-Control-Allow-Origin', response)
+
+    def test_api_is_readable_but_never_with_credentials_by_default(self):
+        response = self.client.get('/featured/games/', HTTP_ORIGIN='https://evil.example')
+        self.assertEqual(response['Access-Control-Allow-Origin'], '*')
+        self.assertNotIn('Access-Control-Allow-Credentials', response)
+
+    @override_settings(CORS_ALLOWED_ORIGINS=['https://client.example'], CORS_ALLOW_ALL_ORIGINS=False,
+                       CORS_ALLOW_CREDENTIALS=True)
+    def test_credentials_only_for_listed_origins(self):
+        response = self.client.get('/featured/games/', HTTP_ORIGIN='https://client.example')
+        self.assertEqual(response['Access-Control-Allow-Origin'], 'https://client.example')
+        self.assertEqual(response['Access-Control-Allow-Credentials'], 'true')
+        response = self.client.get('/featured/games/', HTTP_ORIGIN='https://evil.example')
+        self.assertNotIn('Access-Control-Allow-Origin', response)
@@ -1,4 +1,7 @@
 from django.urls import path
-from .views import get_featured_games
+from .views import get_featured_games, vote_featured_game
 
-urlpatterns = [path('games/', get_featured_games),]
+urlpatterns = [
+    path('games/', get_featured_games),
+    path('games/<int:featured_id>/vote/', vote_featured_game),
+]
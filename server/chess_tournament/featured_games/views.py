@@ -1,7 +1,11 @@
+from django.conf import settings
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from .models import Featured, Game
+from .models import Featured
+from .votes import VOTES, pending_votes, record_vote, totals
 from typing import TypedDict
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from django.db.models import Q
 
 class ChessGame(TypedDict):
     id: int
@@ -20,33 +24,114 @@ class ChessGame(TypedDict):
     image: str
     userLiked: bool
 
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+VOTE_COOKIE = "featured_votes"
+VOTE_COOKIE_SALT = "featured_games.votes"
+VOTE_COOKIE_MAX_AGE = 365 * 24 * 3600
+MAX_COOKIE_VOTES = 300  # keeps the cookie well under 4 KB; the oldest votes are forgotten first
+
+
+def encode_cursor(featured):
+    return urlsafe_b64encode(f"{featured.like}:{featured.id}".encode()).decode()
+
+
+def decode_cursor(cursor):
+    like, featured_id = urlsafe_b64decode(cursor.encode()).decode().split(":")
+    return int(like), int(featured_id)
+
+
+def read_votes(request):
+    """This visitor's votes, featured id -> "like" | "dislike", from their signed cookie."""
+    cookie = request.get_signed_cookie(VOTE_COOKIE, default="", salt=VOTE_COOKIE_SALT)
+    my_votes = {}
+    for item in filter(None, cookie.split(",")):
+        featured_id, vote = item[:-1], item[-1:]
+        if featured_id.isdigit() and vote in ("l", "d"):
+            my_votes[int(featured_id)] = "like" if vote == "l" else "dislike"
+    return my_votes
+
+
+def write_votes(response, my_votes):
+    items = [f"{featured_id}{vote[0]}" for featured_id, vote in my_votes.items()][-MAX_COOKIE_VOTES:]
+    samesite = settings.FEATURED_VOTE_COOKIE_SAMESITE
+    response.set_signed_cookie(
+        VOTE_COOKIE, ",".join(items), salt=VOTE_COOKIE_SALT, max_age=VOTE_COOKIE_MAX_AGE,
+        httponly=True, samesite=samesite, secure=samesite == "None",
+    )
+
+
 @api_view(["GET"])
 def get_featured_games(request):
     try:
-        games = Featured.objects.all()
-        output=[]
-        for index,game in enumerate(games):
-            game_field = Game.objects.get(id=game.game_id)
-            req_game: ChessGame = {
-                "id":index,
-                "white":game_field.ply1.name,
-                "black":game_field.ply2.name,
-                "event":game_field.tournament.name,
-                "date":None,
-                "description":None,
-                "dislikes":game.dislike,
-                "likes":game.like,
-                "moves":None,
-                "opening":None,
-                "result":game_field.result,
-                "views":None,
-                "duration":None,
-                "image":"/placeholder.svg?height=200&width=350",
-                "userLiked":False,
-                "userDisliked":False
-            }
-            output.append(req_game)
-
-        return Response({"featured_games":output})
-    except Featured.DoesNotExist:
-        return Response({"message":"No featured games found"})
\ No newline at end of file
+        limit = max(1, min(int(request.query_params.get("limit", DEFAULT_LIMIT)), MAX_LIMIT))
+    except ValueError:
+        return Response({"error": "limit must be an integer"}, status=400)
+
+    games = Featured.objects.select_related("game__ply1", "game__ply2", "game__tournament").order_by("-like", "-id")
+    cursor = request.query_params.get("cursor")
+    if cursor:
+        try:
+            like, featured_id = decode_cursor(cursor)
+        except (ValueError, UnicodeDecodeError):
+            return Response({"error": "Invalid cursor"}, status=400)
+        games = games.filter(Q(like__lt=like) | Q(like=like, id__lt=featured_id))
+
+    page = list(games[:limit + 1])
+    # Order and cursors follow the stored counts; shown counts include buffered votes.
+    next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+    pending = pending_votes([game.id for game in page[:limit]])
+    my_votes = read_votes(request)
+    output = []
+    for game in page[:limit]:
+        game_field = game.game
+        likes, dislikes = totals(game, pending)
+        my_vote = my_votes.get(game.id)
+        req_game: ChessGame = {
+            "id":game.id,
+            "white":game_field.ply1.name,
+            "black":game_field.ply2.name,
+            "event":game_field.tournament.name if game_field.tournament else None,
+            "date":None,
+            "description":None,
+            "dislikes":dislikes,
+            "likes":likes,
+            "moves":None,
+            "opening":None,
+            "result":game_field.result,
+            "views":None,
+            "duration":None,
+            "image":"/placeholder.svg?height=200&width=350",
+            "userLiked":my_vote == "like",
+            "userDisliked":my_vote == "dislike"
+        }
+        output.append(req_game)
+
+    return Response({"featured_games":output, "next_cursor":next_cursor})
+
+
+@api_view(["POST"])
+def vote_featured_game(request, featured_id):
+    """Set this visitor's vote: {"vote": "like"|"dislike"|null}.
+
+    The vote being replaced comes from the visitor's signed cookie, so
+    repeating a vote changes nothing and a client cannot undo votes it never
+    cast. Nothing is written to the database until the vote buffer flushes.
+    """
+    vote = request.data.get("vote")
+    if vote not in (*VOTES, None):
+        return Response({"error": "vote must be 'like', 'dislike' or null"}, status=400)
+
+    featured = Featured.objects.filter(id=featured_id).only("id", "like", "dislike").first()
+    if featured is None:
+        return Response({"error": "Featured game not found"}, status=404)
+    my_votes = read_votes(request)
+    previous = my_votes.pop(featured.id, None)
+    if vote is not None:
+        my_votes[featured.id] = vote
+    record_vote(featured.id, vote, previous)
+    likes, dislikes = totals(featured, pending_votes([featured.id]))
+    response = Response({"id": featured.id, "likes": likes, "dislikes": dislikes, "vote": vote})
+    if vote != previous:
+        write_votes(response, my_votes)
+    return response
@@ -0,0 +1,138 @@
+"""
+Write-behind like/dislike counters for featured games.
+
+Votes only bump an in-process buffer under a lock. The buffer is written to
+the database as ``F()`` increments, one UPDATE per distinct (like, dislike)
+delta, when it holds FEATURED_VOTE_FLUSH_THRESHOLD votes or
+FEATURED_VOTE_FLUSH_INTERVAL seconds after its first vote, whichever comes
+first. A popular game therefore costs one row update per flush, not per
+click. Reads add whatever this process still holds to the stored counts.
+Each worker keeps its own buffer, so other workers see a vote once it has
+been flushed.
+"""
+
+import atexit
+import logging
+import threading
+from collections import defaultdict
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from .models import Featured
+
+logger = logging.getLogger(__name__)
+
+VOTES = ("like", "dislike")
+
+_lock = threading.Lock()
+_pending = {}  # featured id -> [like delta, dislike delta]
+_buffered = 0
+_timer = None
+
+
+def record_vote(featured_id, vote=None, previous=None):
+    """Buffer a change of vote from ``previous`` to ``vote`` (either may be None)."""
+    global _buffered
+    if vote == previous:
+        return
+    flush_now = False
+    with _lock:
+        delta = _pending.setdefault(featured_id, [0, 0])
+        if vote is not None:
+            delta[VOTES.index(vote)] += 1
+        if previous is not None:
+            delta[VOTES.index(previous)] -= 1
+        _buffered += 1
+        if _buffered >= settings.FEATURED_VOTE_FLUSH_THRESHOLD:
+            flush_now = True
+        else:
+            start_timer()
+    if flush_now:
+        try:
+            flush_votes()
+        except Exception:
+            # The votes are back in the buffer and the timer retries them.
+            logger.exception("Could not flush featured game votes; %d kept in the buffer", buffered_votes())
+
+
+def start_timer():
+    # Called with _lock held.
+    global _timer
+    if _timer is None:
+        _timer = threading.Timer(settings.FEATURED_VOTE_FLUSH_INTERVAL, flush_in_background)
+        _timer.daemon = True
+        _timer.start()
+
+
+def buffered_votes():
+    with _lock:
+        return _buffered
+
+
+def pending_votes(featured_ids=None):
+    """Buffered (like, dislike) deltas, for every game or only ``featured_ids``."""
+    with _lock:
+        if featured_ids is None:
+            return {fid: tuple(delta) for fid, delta in _pending.items()}
+        return {fid: tuple(_pending[fid]) for fid in featured_ids if fid in _pending}
+
+
+def totals(featured, pending):
+    like, dislike = pending.get(featured.id, (0, 0))
+    return max(featured.like + like, 0), max(featured.dislike + dislike, 0)
+
+
+def flush_votes():
+    """Write the buffer to the database. Returns the number of rows updated."""
+    global _pending, _buffered, _timer
+    with _lock:
+        pending, buffered = _pending, _buffered
+        _pending, _buffered = {}, 0
+        if _timer is not None:
+            _timer.cancel()
+            _timer = None
+    groups = defaultdict(list)
+    for featured_id, delta in pending.items():
+        if delta != [0, 0]:
+            groups[tuple(delta)].append(featured_id)
+    if not groups:
+        return 0
+
+    updated = 0
+    try:
+        with transaction.atomic():
+            for (like, dislike), ids in groups.items():
+                # Greatest keeps the unsigned columns from dropping below zero.
+                updated += Featured.objects.filter(id__in=ids).update(
+                    like=Greatest(F("like") + like, 0),
+                    dislike=Greatest(F("dislike") + dislike, 0),
+                )
+    except Exception:
+        restore(pending, buffered)
+        raise
+    return updated
+
+
+def flush_in_background():
+    try:
+        flush_votes()
+    except Exception:
+        logger.exception("Could not flush featured game votes; %d kept in the buffer", buffered_votes())
+    finally:
+        connections.close_all()
+
+
+def restore(pending, buffered):
+    """Put the deltas of a failed flush back, counting ``buffered`` votes towards the threshold."""
+    global _buffered
+    with _lock:
+        for featured_id, (like, dislike) in pending.items():
+            delta = _pending.setdefault(featured_id, [0, 0])
+            delta[0] += like
+            delta[1] += dislike
+        _buffered += buffered
+        start_timer()
+
+
+atexit.register(flush_in_background)
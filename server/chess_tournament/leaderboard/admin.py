@@ -1,6 +1,10 @@
 from django.contrib import admin
-from .models import  Tournament
+from .models import  Tournament, Standing, PlayerRating, RatingHistory, Bye
 
 # Register your models here.
 
-admin.site.register(Tournament)
\ No newline at end of file
+admin.site.register(Tournament)
+admin.site.register(Standing)
+admin.site.register(PlayerRating)
+admin.site.register(RatingHistory)
+admin.site.register(Bye)
@@ -0,0 +1,28 @@
+import hashlib
+import json
+from django.db.models import F
+
+RESPONSE_TIMEOUT = 24 * 3600
+
+
+def invalidate(tournaments):
+    """Bump the version of ``tournaments`` (a queryset) so their cached responses are never served again.
+
+    The version lives on the Tournament row, so every worker sees the bump as
+    soon as the surrounding transaction commits, whichever cache it uses.
+    """
+    tournaments.update(version=F("version") + 1)
+
+
+def response_key(tournament_id, version, *variant):
+    return ":".join(["leaderboard", str(version), str(tournament_id), *map(str, variant)])
+
+
+def make_etag(data):
+    body = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return '"' + hashlib.sha1(body.encode()).hexdigest() + '"'
+
+
+def etag_matches(request, etag):
+    header = request.headers.get("If-None-Match", "")
+    return etag in (tag.strip() for tag in header.split(","))
@@ -0,0 +1,96 @@
+"""
+Array-backed standings engine.
+
+Scores and tiebreaks for every round of a tournament are computed at once on
+(rounds x players) NumPy arrays. Players are ranked by score, then Buchholz
+(sum of opponents' scores), Sonneborn-Berger (opponents' scores weighted by
+the points taken from them) and progressive score (sum of the running score
+after each round). Players equal on all four share a competition rank
+(1, 2, 2, 4).
+"""
+
+from typing import NamedTuple
+import numpy as np
+
+POINTS = {"1-0": (1.0, 0.0), "0-1": (0.0, 1.0), "1/2-1/2": (0.5, 0.5)}
+# Pending/unknown results award no points.
+NO_POINTS = (0.0, 0.0)
+RESULT_CODES = {result: code for code, result in enumerate(POINTS)}
+POINTS_TABLE = np.array([*POINTS.values(), NO_POINTS])
+
+TIEBREAKS = ("score", "buchholz", "sonneborn_berger", "progressive")
+
+
+class Tables(NamedTuple):
+    rounds: np.ndarray  # round numbers, ascending
+    players: np.ndarray  # player ids, ascending; column order of every table
+    round_points: np.ndarray
+    score: np.ndarray
+    buchholz: np.ndarray
+    sonneborn_berger: np.ndarray
+    progressive: np.ndarray
+    rank: np.ndarray
+
+
+def game_arrays(games, players):
+    """Turn (round, ply1_id, ply2_id, result) tuples into column arrays sorted by round."""
+    unknown = len(POINTS)
+    columns = np.fromiter(
+        (value for g in games for value in (g[0], g[1], g[2], RESULT_CODES.get(g[3], unknown))),
+        dtype=np.int64,
+        count=4 * len(games),
+    ).reshape(len(games), 4)
+    columns = columns[np.argsort(columns[:, 0], kind="stable")]
+    points = POINTS_TABLE[columns[:, 3]]
+    return (
+        columns[:, 0],
+        np.searchsorted(players, columns[:, 1]),
+        np.searchsorted(players, columns[:, 2]),
+        points[:, 0],
+        points[:, 1],
+    )
+
+
+def competition_ranks(keys):
+    """Rank each row of the (rounds x players) ``keys`` arrays, higher is better."""
+    order = np.lexsort(tuple(-key for key in reversed(keys)), axis=-1)
+    ordered = [np.take_along_axis(key, order, axis=-1) for key in keys]
+    new_group = np.ones(order.shape, dtype=bool)
+    new_group[:, 1:] = np.logical_or.reduce([key[:, 1:] != key[:, :-1] for key in ordered])
+    positions = np.arange(1, order.shape[1] + 1)
+    ranks_sorted = np.maximum.accumulate(np.where(new_group, positions, 0), axis=-1)
+    ranks = np.empty_like(ranks_sorted)
+    np.put_along_axis(ranks, order, ranks_sorted, axis=-1)
+    return ranks
+
+
+def compute(games, player_ids):
+    """Compute every table for ``games`` between ``player_ids``."""
+    players = np.array(sorted(player_ids), dtype=np.int64)
+    game_rounds, white, black, white_points, black_points = game_arrays(games, players)
+    rounds = np.unique(game_rounds)
+    n = len(players)
+
+    round_index = np.searchsorted(rounds, game_rounds)
+    round_points = np.zeros((len(rounds), n))
+    np.add.at(round_points, (round_index, white), white_points)
+    np.add.at(round_points, (round_index, black), black_points)
+    score = np.cumsum(round_points, axis=0)
+    progressive = np.cumsum(score, axis=0)
+
+    # Games are sorted by round, so the games played up to a round are a prefix.
+    played = np.searchsorted(round_index, np.arange(len(rounds)), side="right")
+    buchholz = np.empty_like(score)
+    sonneborn_berger = np.empty_like(score)
+    for r, end in enumerate(played):
+        current = score[r]
+        w, b = white[:end], black[:end]
+        opponent_of_white, opponent_of_black = current[b], current[w]
+        buchholz[r] = (np.bincount(w, opponent_of_white, n) + np.bincount(b, opponent_of_black, n))
+        sonneborn_berger[r] = (
+            np.bincount(w, opponent_of_white * white_points[:end], n)
+            + np.bincount(b, opponent_of_black * black_points[:end], n)
+        )
+
+    rank = competition_ranks((score, buchholz, sonneborn_berger, progressive))
+    return Tables(rounds, players, round_points, score, buchholz, sonneborn_berger, progressive, rank)
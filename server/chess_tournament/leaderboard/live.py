@@ -0,0 +1,94 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from players.models import Player
+from players.stats import refresh_in_background
+from .models import Standing
+from .pubsub import CHANNEL, get_backend
+from .standings import rebuild_standings
+
+
+DIFF_FIELDS = ("score", "round_points", "rank", "rating", "buchholz", "sonneborn_berger")
+
+
+def standing_row(standing, names):
+    gained = standing.round_points
+    return {
+        "round": standing.round,
+        "player": standing.player_id,
+        "name": names.get(standing.player_id, ""),
+        "rank": standing.rank,
+        "rating": standing.rating,
+        "score": standing.score,
+        "buchholz": standing.buchholz,
+        "sonnebornBerger": standing.sonneborn_berger,
+        "performance": f"+{gained:g}" if gained > 0 else "0",
+    }
+
+
+def rebuild_and_publish(tournament, from_round=None):
+    """Rebuild standings and broadcast the rows that changed, if the tournament is live."""
+    if not tournament.currently_active:
+        return rebuild_standings(tournament, from_round)[0]
+
+    # Load every round: a new player makes rebuild_standings redo them all.
+    before = {
+        (round_id, player_id): values
+        for round_id, player_id, *values in
+        Standing.objects.filter(tournament=tournament).values_list("round", "player_id", *DIFF_FIELDS)
+    }
+
+    standings, from_round = rebuild_standings(tournament, from_round)
+
+    changed = []
+    for standing in standings:
+        key = (standing.round, standing.player_id)
+        if before.pop(key, None) != [getattr(standing, field) for field in DIFF_FIELDS]:
+            changed.append(standing)
+    if from_round is not None:
+        # A partial rebuild kept the earlier rounds as they were.
+        before = {key: value for key, value in before.items() if key[0] >= from_round}
+    # Whatever is left in ``before`` no longer exists after the rebuild.
+    removed = [{"round": round_id, "player": player_id} for round_id, player_id in before]
+    if not changed and not removed:
+        return standings
+
+    names = dict(
+        Player.objects.filter(id__in={s.player_id for s in changed}).values_list("id", "name")
+    )
+    message = {
+        "type": "delta",
+        "tournament": tournament.id,
+        "changes": [standing_row(standing, names) for standing in changed],
+        "removed": removed,
+    }
+    transaction.on_commit(lambda: get_backend().publish(CHANNEL, message))
+    return standings
+
+
+RATING_CHECK_INTERVAL = 60
+
+
+def refresh_stale_ratings(tournament):
+    """Queue a background refresh of stale ratings, at most once a minute per tournament.
+
+    The leaderboard keeps serving the stored ratings meanwhile; the refresh
+    rewrites the standings and pushes the delta when it lands.
+    """
+    if settings.RATING_SOURCE == "local":
+        return None
+    if not cache.add(f"leaderboard:ratings-checked:{tournament.id}", 1, RATING_CHECK_INTERVAL):
+        return None
+    cutoff = timezone.now() - timedelta(seconds=settings.CHESSCOM_STATS_MAX_AGE)
+    player_ids = list(
+        Standing.objects.filter(tournament=tournament)
+        .filter(Q(player__chess_stats__isnull=True) | Q(player__chess_stats__fetched_at__lt=cutoff))
+        .values_list("player_id", flat=True)
+        .distinct()
+    )
+    if not player_ids:
+        return None
+    return refresh_in_background(player_ids, on_done=lambda: rebuild_and_publish(tournament))
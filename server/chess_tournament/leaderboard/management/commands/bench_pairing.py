@@ -0,0 +1,77 @@
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+
+from leaderboard.pairing import Entrant, pair
+
+
+def play(white, black, strength, rng):
+    expected = 1 / (1 + 10 ** ((strength[black] - strength[white]) / 400))
+    roll = rng.random()
+    if roll < 0.2:
+        return 0.5
+    return 1.0 if roll < 0.2 + 0.8 * expected else 0.0
+
+
+class Command(BaseCommand):
+    help = 'Simulate a Swiss tournament in memory, timing each pairing and checking its constraints'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=2000)
+        parser.add_argument('--rounds', type=int, default=9)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        ids = list(range(1, options['players'] + 1))
+        strength = {pid: rng.gauss(1500, 300) for pid in ids}
+        ratings = {pid: max(0, int(strength[pid] + rng.gauss(0, 100))) for pid in ids}
+        scores = dict.fromkeys(ids, 0.0)
+        opponents = {pid: set() for pid in ids}
+        colours = dict.fromkeys(ids, '')
+        byes = dict.fromkeys(ids, 0)
+        timings = []
+        problems = []
+
+        for round_id in range(1, options['rounds'] + 1):
+            entrants = [
+                Entrant(pid, scores[pid], ratings[pid], frozenset(opponents[pid]), colours[pid], byes[pid])
+                for pid in ids
+            ]
+            started = time.perf_counter()
+            pairs, bye = pair(entrants)
+            timings.append(time.perf_counter() - started)
+
+            seated = [entrant.id for board in pairs for entrant in board] + ([bye.id] if bye else [])
+            if sorted(seated) != ids:
+                problems.append(f'round {round_id}: players missing or seated twice')
+            for white, black in pairs:
+                if black.id in opponents[white.id]:
+                    problems.append(f'round {round_id}: rematch {white.id} v {black.id}')
+                result = play(white.id, black.id, strength, rng)
+                scores[white.id] += result
+                scores[black.id] += 1 - result
+                opponents[white.id].add(black.id)
+                opponents[black.id].add(white.id)
+                colours[white.id] += 'W'
+                colours[black.id] += 'B'
+            if bye:
+                byes[bye.id] += 1
+
+        for pid in ids:
+            balance = colours[pid].count('W') - colours[pid].count('B')
+            if abs(balance) > 2 or 'WWW' in colours[pid] or 'BBB' in colours[pid]:
+                problems.append(f'player {pid}: unbalanced colours {colours[pid]}')
+            if byes[pid] > 1:
+                problems.append(f'player {pid}: {byes[pid]} byes')
+
+        self.stdout.write(
+            f"{options['players']} players, {options['rounds']} rounds: "
+            f"median {statistics.median(timings) * 1000:.1f} ms, max {max(timings) * 1000:.1f} ms per round"
+        )
+        if problems:
+            for problem in problems[:20]:
+                self.stdout.write(self.style.WARNING(problem))
+            raise CommandError(f'{len(problems)} pairing constraint violations')
+        self.stdout.write(self.style.SUCCESS('✅ No rematches, colour imbalances or repeated byes'))
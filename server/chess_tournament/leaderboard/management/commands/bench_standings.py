@@ -0,0 +1,94 @@
+from collections import defaultdict
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+
+from leaderboard import engine
+
+
+def synthetic_games(players, rounds, rng):
+    """Random pairings and results, one game per pair of players per round."""
+    games = []
+    for round_id in range(1, rounds + 1):
+        order = rng.sample(range(1, players + 1), players)
+        for white, black in zip(order[::2], order[1::2]):
+            games.append((round_id, white, black, rng.choice(("1-0", "0-1", "1/2-1/2"))))
+    return games
+
+
+def python_standings(games, player_ids):
+    """Plain dict-and-sort loop computing the same ranks as the engine, for comparison."""
+    games_by_round = defaultdict(list)
+    for game in games:
+        games_by_round[game[0]].append(game)
+
+    scores = defaultdict(float)
+    progressive = defaultdict(float)
+    played = []
+    ranks = {}
+    for round_id in sorted(games_by_round):
+        for _, white, black, result in games_by_round[round_id]:
+            white_points, black_points = engine.POINTS.get(result, engine.NO_POINTS)
+            scores[white] += white_points
+            scores[black] += black_points
+            played.append((white, black, white_points, black_points))
+        buchholz = defaultdict(float)
+        sonneborn_berger = defaultdict(float)
+        for white, black, white_points, black_points in played:
+            buchholz[white] += scores[black]
+            buchholz[black] += scores[white]
+            sonneborn_berger[white] += scores[black] * white_points
+            sonneborn_berger[black] += scores[white] * black_points
+        for player_id in player_ids:
+            progressive[player_id] += scores[player_id]
+
+        def key(player_id):
+            return (scores[player_id], buchholz[player_id], sonneborn_berger[player_id], progressive[player_id])
+
+        ordered = sorted(player_ids, key=key, reverse=True)
+        previous = None
+        for index, player_id in enumerate(ordered, 1):
+            if key(player_id) != previous:
+                rank = index
+                previous = key(player_id)
+            ranks[round_id, player_id] = rank
+    return ranks
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - started)
+    return result, statistics.median(samples)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the NumPy standings engine against a plain Python loop on a synthetic open'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=5000)
+        parser.add_argument('--rounds', type=int, default=11)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        games = synthetic_games(options['players'], options['rounds'], rng)
+        player_ids = list(range(1, options['players'] + 1))
+        self.stdout.write(f"{options['players']} players, {options['rounds']} rounds, {len(games)} games")
+
+        tables, engine_time = timed(lambda: engine.compute(games, player_ids), options['repeat'])
+        ranks, python_time = timed(lambda: python_standings(games, player_ids), options['repeat'])
+
+        for r, round_id in enumerate(tables.rounds.tolist()):
+            for player_id, rank in zip(tables.players.tolist(), tables.rank[r].tolist()):
+                if ranks[round_id, player_id] != rank:
+                    raise CommandError(f'Round {round_id}, player {player_id}: engine rank {rank}, '
+                                       f'python rank {ranks[round_id, player_id]}')
+
+        self.stdout.write(f'numpy engine   {engine_time * 1000:8.1f} ms')
+        self.stdout.write(f'python loop    {python_time * 1000:8.1f} ms ({python_time / engine_time:.0f}x slower)')
+        self.stdout.write(self.style.SUCCESS('✅ Both implementations agree on every rank'))
@@ -0,0 +1,47 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+
+from featured_games.models import Game
+from leaderboard.models import Tournament
+from leaderboard.pairing import create_round
+
+
+class Command(BaseCommand):
+    help = ('Pair the next Swiss round of a tournament and create its games. With an odd field one player '
+            'gets a bye; it is recorded so nobody gets a second one, but scores no points in the standings')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tournament', type=int, help='Tournament id; defaults to the active tournament')
+        parser.add_argument('--players', help='Comma-separated player ids to pair, saved as the field for later '
+                                              'rounds; defaults to the saved field (required for round 1)')
+        parser.add_argument('--allow-pending', action='store_true',
+                            help='Pair even if games of the previous round have no result yet')
+
+    def handle(self, *args, **options):
+        tournaments = Tournament.objects.all()
+        if options['tournament']:
+            tournament = tournaments.filter(id=options['tournament']).first()
+        else:
+            tournament = tournaments.filter(currently_active=True).first()
+        if tournament is None:
+            raise CommandError('Tournament not found')
+
+        player_ids = None
+        if options['players']:
+            try:
+                player_ids = {int(value) for value in options['players'].split(',') if value.strip()}
+            except ValueError:
+                raise CommandError('--players must be a comma-separated list of ids')
+        elif not tournament.entrants.exists() and not Game.objects.filter(tournament=tournament).exists():
+            raise CommandError('The tournament has no games yet; pass --players for the first round')
+        if not options['allow_pending'] and Game.objects.filter(tournament=tournament, result__isnull=True).exists():
+            raise CommandError('Some games still have no result; enter them or pass --allow-pending')
+
+        started = time.monotonic()
+        round_id, games, bye = create_round(tournament, player_ids)
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(f'Round {round_id}: {len(games)} boards')
+        if bye is not None:
+            self.stdout.write(f'Bye: player {bye.id}')
+        self.stdout.write(self.style.SUCCESS(f'✅ Paired round {round_id} of {tournament} in {elapsed:.2f}s'))
@@ -0,0 +1,28 @@
+import time
+from django.core.management.base import BaseCommand
+
+from leaderboard.models import Tournament
+from leaderboard.standings import rebuild_standings
+
+
+class Command(BaseCommand):
+    help = 'Recompute the materialized Standing table from Game results'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tournament', type=int, action='append', dest='tournaments',
+                            help='Tournament id to rebuild (repeatable); defaults to all tournaments')
+        parser.add_argument('--active', action='store_true', help='Only rebuild currently active tournaments')
+
+    def handle(self, *args, **options):
+        tournaments = Tournament.objects.order_by('id')
+        if options['tournaments']:
+            tournaments = tournaments.filter(id__in=options['tournaments'])
+        if options['active']:
+            tournaments = tournaments.filter(currently_active=True)
+
+        for tournament in tournaments:
+            started = time.monotonic()
+            rows, _ = rebuild_standings(tournament)
+            self.stdout.write(f'{tournament}: {len(rows)} rows in {time.monotonic() - started:.2f}s')
+
+        self.stdout.write(self.style.SUCCESS('✅ Standings rebuilt'))
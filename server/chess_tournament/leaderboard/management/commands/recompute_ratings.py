@@ -0,0 +1,21 @@
+import time
+from django.core.management.base import BaseCommand
+
+from leaderboard.models import PlayerRating, Tournament
+from leaderboard.ratings import update_ratings
+from leaderboard.standings import rebuild_standings
+
+
+class Command(BaseCommand):
+    help = 'Recompute every local Glicko-2 rating from the stored game results'
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        rounds = update_ratings()
+        self.stdout.write(f'{rounds} rounds rated in {time.monotonic() - started:.2f}s')
+
+        # Standings carry a copy of each player's rating.
+        for tournament in Tournament.objects.filter(currently_active=True):
+            rebuild_standings(tournament)
+
+        self.stdout.write(self.style.SUCCESS(f'✅ {PlayerRating.objects.count()} player ratings recomputed'))
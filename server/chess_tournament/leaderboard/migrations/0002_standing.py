@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-18 13:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaderboard', '0001_initial'),
+        ('players', '0003_openingstat_openingindex'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Standing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('round', models.PositiveIntegerField()),
+                ('score', models.FloatField(default=0)),
+                ('round_points', models.FloatField(default=0)),
+                ('rating', models.PositiveIntegerField(default=0)),
+                ('rank', models.PositiveIntegerField(default=1)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='players.player')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='leaderboard.tournament')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tournament', 'round', 'rank'], name='standing_round_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('tournament', 'round', 'player'), name='unique_standing')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 11:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaderboard', '0002_standing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='standing',
+            name='buchholz',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='standing',
+            name='progressive',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='standing',
+            name='sonneborn_berger',
+            field=models.FloatField(default=0),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 11:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaderboard', '0003_standing_tiebreaks'),
+        ('players', '0003_openingstat_openingindex'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='entrants',
+            field=models.ManyToManyField(blank=True, related_name='entered_tournaments', to='players.player'),
+        ),
+    ]
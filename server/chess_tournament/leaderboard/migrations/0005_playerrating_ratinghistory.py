@@ -0,0 +1,45 @@
+# Generated by Django 5.2 on 2026-10-18 11:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaderboard', '0004_tournament_entrants'),
+        ('players', '0003_openingstat_openingindex'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerRating',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating', models.FloatField(default=1500)),
+                ('rd', models.FloatField(default=350)),
+                ('volatility', models.FloatField(default=0.06)),
+                ('games', models.PositiveIntegerField(default=0)),
+                ('round', models.PositiveIntegerField()),
+                ('player', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='local_rating', to='players.player')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='leaderboard.tournament')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RatingHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('round', models.PositiveIntegerField()),
+                ('rating', models.FloatField()),
+                ('rd', models.FloatField()),
+                ('volatility', models.FloatField()),
+                ('games', models.PositiveIntegerField(default=0)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rating_history', to='players.player')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rating_history', to='leaderboard.tournament')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['player', 'tournament', 'round'], name='rating_history_player_idx')],
+                'constraints': [models.UniqueConstraint(fields=('tournament', 'round', 'player'), name='unique_rating_history')],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2 on 2026-10-18 11:34
+
+import django.db.models.deletion
+from collections import defaultdict
+from django.db import migrations, models
+
+
+def backfill_byes(apps, schema_editor):
+    # Byes used to be inferred; a round missing exactly one registered entrant had a bye.
+    Tournament = apps.get_model('leaderboard', 'Tournament')
+    Game = apps.get_model('featured_games', 'Game')
+    Bye = apps.get_model('leaderboard', 'Bye')
+    byes = []
+    for tournament in Tournament.objects.filter(entrants__isnull=False).distinct():
+        entrants = set(tournament.entrants.values_list('id', flat=True))
+        seated = defaultdict(set)
+        for round_id, white, black in Game.objects.filter(tournament=tournament).values_list('round', 'ply1_id', 'ply2_id'):
+            seated[round_id].update((white, black))
+        for round_id, players in seated.items():
+            missing = entrants - players
+            if len(missing) == 1:
+                byes.append(Bye(tournament=tournament, round=round_id, player_id=missing.pop()))
+    Bye.objects.bulk_create(byes)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaderboard', '0005_playerrating_ratinghistory'),
+        ('players', '0003_openingstat_openingindex'),
+        ('featured_games', '0003_game_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Bye',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('round', models.PositiveIntegerField()),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='byes', to='players.player')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='byes', to='leaderboard.tournament')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('tournament', 'round'), name='unique_bye_per_round')],
+            },
+        ),
+        migrations.RunPython(backfill_byes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 11:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaderboard', '0006_bye'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
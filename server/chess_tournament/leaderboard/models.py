@@ -7,5 +7,79 @@ class Tournament(models.Model):
     winner1 = models.ManyToManyField(Player,blank=True, related_name='first_place')
     winner2 = models.ManyToManyField(Player,blank=True, related_name='second_place')
     winner3 = models.ManyToManyField(Player,blank=True, related_name='third_place')
+    # Players registered for Swiss pairing; empty means whoever has played.
+    entrants = models.ManyToManyField(Player, blank=True, related_name='entered_tournaments')
+    # Bumped whenever anything the leaderboard shows changes; keys its response cache.
+    version = models.PositiveIntegerField(default=0, editable=False)
     def __str__(self):
         return self.name
+
+
+class Standing(models.Model):
+    tournament = models.ForeignKey(Tournament, related_name='standings', on_delete=models.CASCADE)
+    round = models.PositiveIntegerField()
+    player = models.ForeignKey(Player, related_name='standings', on_delete=models.CASCADE)
+    score = models.FloatField(default=0)  # cumulative up to and including this round
+    round_points = models.FloatField(default=0)
+    buchholz = models.FloatField(default=0)
+    sonneborn_berger = models.FloatField(default=0)
+    progressive = models.FloatField(default=0)
+    rating = models.PositiveIntegerField(default=0)  # shown next to the player; not used for ranking
+    rank = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tournament', 'round', 'player'], name='unique_standing'),
+        ]
+        indexes = [models.Index(fields=['tournament', 'round', 'rank'], name='standing_round_rank_idx')]
+
+    def __str__(self):
+        return f"{self.tournament} R{self.round}: {self.rank}. {self.player.name} ({self.score:g})"
+
+
+class Bye(models.Model):
+    """A round a player sat out because the Swiss field was odd. Byes score no points."""
+    tournament = models.ForeignKey(Tournament, related_name='byes', on_delete=models.CASCADE)
+    round = models.PositiveIntegerField()
+    player = models.ForeignKey(Player, related_name='byes', on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['tournament', 'round'], name='unique_bye_per_round')]
+
+    def __str__(self):
+        return f"{self.tournament} R{self.round}: bye for {self.player.name}"
+
+
+class PlayerRating(models.Model):
+    """A player's latest Glicko-2 rating computed from games played here."""
+    player = models.OneToOneField(Player, related_name='local_rating', on_delete=models.CASCADE)
+    rating = models.FloatField(default=1500)
+    rd = models.FloatField(default=350)
+    volatility = models.FloatField(default=0.06)
+    games = models.PositiveIntegerField(default=0)
+    # Rating period (tournament round) of the latest update.
+    tournament = models.ForeignKey(Tournament, related_name='+', on_delete=models.CASCADE)
+    round = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.player.name}: {self.rating:.0f} ± {self.rd:.0f}"
+
+
+class RatingHistory(models.Model):
+    """Rating after each round a player took part in."""
+    tournament = models.ForeignKey(Tournament, related_name='rating_history', on_delete=models.CASCADE)
+    round = models.PositiveIntegerField()
+    player = models.ForeignKey(Player, related_name='rating_history', on_delete=models.CASCADE)
+    rating = models.FloatField()
+    rd = models.FloatField()
+    volatility = models.FloatField()
+    games = models.PositiveIntegerField(default=0)  # games rated in this round
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tournament', 'round', 'player'], name='unique_rating_history'),
+        ]
+        indexes = [models.Index(fields=['player', 'tournament', 'round'], name='rating_history_player_idx')]
+
+    def __str__(self):
+        return f"{self.player.name} after {self.tournament} R{self.round}: {self.rating:.0f}"
@@ -0,0 +1,255 @@
+"""
+Swiss pairing.
+
+Players are ranked by score, then rating. Each score group is split in half
+and the top half is matched against the bottom half (1 v n/2+1, 2 v n/2+2,
+...). Conflicts are resolved with augmenting paths (bipartite matching)
+rather than backtracking over permutations. Two players may meet if they have
+not played each other and would not both need the same colour. Whoever can't
+be paired in their group floats down to the next one. The lowest-ranked
+player with the fewest byes sits out when the field is odd; byes are stored
+as Bye rows and score no points in the standings.
+"""
+
+from collections import Counter, deque
+from itertools import chain, groupby
+from typing import NamedTuple
+from django.db import transaction
+from featured_games.models import Game
+from players.models import PlayerStats
+from . import engine
+from .live import rebuild_and_publish
+from .models import Bye
+
+
+class Entrant(NamedTuple):
+    id: int
+    score: float
+    rating: int
+    opponents: frozenset
+    colours: str  # "W"/"B" per game played, oldest first
+    byes: int
+
+
+def colour_balance(entrant):
+    return entrant.colours.count("W") - entrant.colours.count("B")
+
+
+def required_colour(entrant):
+    """The colour a player must get next: "W", "B" or None."""
+    balance = colour_balance(entrant)
+    if balance >= 2 or entrant.colours.endswith("WW"):
+        return "B"
+    if balance <= -2 or entrant.colours.endswith("BB"):
+        return "W"
+    return None
+
+
+def preferred_colour(entrant):
+    balance = colour_balance(entrant)
+    if balance:
+        return "B" if balance > 0 else "W"
+    if entrant.colours:
+        return "B" if entrant.colours[-1] == "W" else "W"
+    return None
+
+
+def can_meet(a, b, strict=True):
+    if b.id in a.opponents:
+        return False
+    return not strict or required_colour(a) is None or required_colour(a) != required_colour(b)
+
+
+def allocate_colours(higher, lower, board):
+    """Return (white, black) for two paired players, ``higher`` being ranked above ``lower``."""
+    for first, second in ((higher, lower), (lower, higher)):
+        need = required_colour(first)
+        if need and need != required_colour(second):
+            return (first, second) if need == "W" else (second, first)
+    high, low = preferred_colour(higher), preferred_colour(lower)
+    if high and high != low:
+        return (higher, lower) if high == "W" else (lower, higher)
+    if low:
+        return (lower, higher) if low == "W" else (higher, lower)
+    # Nobody has played yet: alternate colours down the boards.
+    return (higher, lower) if board % 2 == 0 else (lower, higher)
+
+
+def match_halves(top, bottom, strict):
+    """Match ``top`` against ``bottom``, preferring top[i] v bottom[i].
+
+    Returns {top index: bottom index}. Each top player is added with a
+    breadth-first search for an augmenting path, so earlier matches are only
+    rearranged when that lets one more pair be made.
+    """
+    def candidates(i):
+        # Natural opponent first, then further down, then further up.
+        for j in chain(range(i, len(bottom)), range(i - 1, -1, -1)):
+            if can_meet(top[i], bottom[j], strict):
+                yield j
+
+    bottom_match = {}
+    top_match = {}
+    for start in range(len(top)):
+        parent = {}
+        queue = deque([start])
+        seen = {start}
+        found = None
+        while queue and found is None:
+            i = queue.popleft()
+            for j in candidates(i):
+                if j in parent:
+                    continue
+                parent[j] = i
+                if j not in bottom_match:
+                    found = j
+                    break
+                k = bottom_match[j]
+                if k not in seen:
+                    seen.add(k)
+                    queue.append(k)
+        # Flip the path so every top player along it moves to its new partner.
+        while found is not None:
+            i = parent[found]
+            previous = top_match.get(i)
+            top_match[i] = found
+            bottom_match[found] = i
+            found = previous
+    return top_match
+
+
+def pair_group(group, strict=True):
+    """Pair one score group; returns (pairs, players left over) in ranking order."""
+    half = len(group) // 2
+    top, bottom = group[:half], group[half:]
+    matched = match_halves(top, bottom, strict)
+    pairs = [(top[i], bottom[j]) for i, j in sorted(matched.items())]
+
+    # Players left in either half may still be able to play each other.
+    used = {i for i in matched} | {half + j for j in matched.values()}
+    leftover = [player for index, player in enumerate(group) if index not in used]
+    remaining = []
+    for player in leftover:
+        partner = next((other for other in remaining if can_meet(other, player, strict)), None)
+        if partner is None:
+            remaining.append(player)
+        else:
+            remaining.remove(partner)
+            pairs.append((partner, player))
+    return pairs, remaining
+
+
+def pair_groups(groups):
+    pairs = []
+    floaters = []
+    for group in groups:
+        group_pairs, floaters = pair_group(floaters + group)
+        pairs.extend(group_pairs)
+    return pairs, floaters
+
+
+def rank_key(entrant):
+    return (-entrant.score, -entrant.rating, entrant.id)
+
+
+def pair(entrants):
+    """Pair a round. Returns ([(white, black), ...] in board order, bye or None)."""
+    ranked = sorted(entrants, key=rank_key)
+    bye = None
+    if len(ranked) % 2:
+        fewest = min(entrant.byes for entrant in ranked)
+        bye = next(entrant for entrant in reversed(ranked) if entrant.byes == fewest)
+        ranked.remove(bye)
+
+    groups = [list(members) for _, members in groupby(ranked, key=lambda entrant: entrant.score)]
+    while True:
+        pairs, floaters = pair_groups(groups)
+        if not floaters or len(groups) <= 1:
+            break
+        # The last group could not absorb the floaters: merge it with the one above.
+        groups = groups[:-2] + [groups[-2] + groups[-1]]
+    if floaters:
+        # The bottom of the field: relax colours first, then allow rematches.
+        group_pairs, floaters = pair_group(floaters, strict=False)
+        pairs.extend(group_pairs)
+        pairs.extend(zip(floaters[::2], floaters[1::2]))
+
+    # Board 1 holds the highest-ranked player, who is listed first in each pair.
+    boards = sorted(
+        ((a, b) if rank_key(a) <= rank_key(b) else (b, a) for a, b in pairs),
+        key=lambda board: rank_key(board[0]),
+    )
+    return [allocate_colours(higher, lower, board) for board, (higher, lower) in enumerate(boards)], bye
+
+
+def load_entrants(tournament, player_ids=None):
+    """Build an Entrant per player from the tournament's games so far.
+
+    ``player_ids`` defaults to the tournament's registered entrants, or to
+    everyone who has played in it when nobody is registered.
+    Returns (entrants, last round played).
+    """
+    games = list(
+        Game.objects.filter(tournament=tournament)
+        .order_by("round", "id")
+        .values_list("round", "ply1_id", "ply2_id", "result")
+    )
+    if player_ids is None:
+        player_ids = set(tournament.entrants.values_list("id", flat=True))
+    if not player_ids:
+        player_ids = {g[1] for g in games} | {g[2] for g in games}
+    player_ids = set(player_ids)
+    played_ids = {g[1] for g in games} | {g[2] for g in games}
+
+    tables = engine.compute(games, played_ids)
+    scores = dict(zip(tables.players.tolist(), tables.score[-1].tolist())) if games else {}
+    opponents = {player_id: set() for player_id in player_ids}
+    colours = {player_id: [] for player_id in player_ids}
+    for _, white, black, _ in games:
+        if white in player_ids:
+            opponents[white].add(black)
+            colours[white].append("W")
+        if black in player_ids:
+            opponents[black].add(white)
+            colours[black].append("B")
+    byes = Counter(Bye.objects.filter(tournament=tournament).values_list("player_id", flat=True))
+    ratings = dict(
+        PlayerStats.objects.filter(player_id__in=player_ids).values_list("player_id", "rapid_rating")
+    )
+    entrants = [
+        Entrant(
+            id=player_id,
+            score=scores.get(player_id, 0.0),
+            rating=ratings.get(player_id, 0),
+            opponents=frozenset(opponents[player_id]),
+            colours="".join(colours[player_id]),
+            byes=byes[player_id],
+        )
+        for player_id in player_ids
+    ]
+    return entrants, max((g[0] for g in games), default=0)
+
+
+def create_round(tournament, player_ids=None):
+    """Pair the next round of ``tournament`` and store its games with no result yet.
+
+    Returns (round number, games, bye entrant or None).
+    """
+    entrants, last_round = load_entrants(tournament, player_ids)
+    pairs, bye = pair(entrants)
+    round_id = last_round + 1
+    with transaction.atomic():
+        if player_ids is not None:
+            # Remember the field so players sitting out a bye stay in it.
+            tournament.entrants.set(player_ids)
+        # Byes of a round that is being paired again no longer apply.
+        Bye.objects.filter(tournament=tournament, round__gte=round_id).delete()
+        if bye is not None:
+            Bye.objects.create(tournament=tournament, round=round_id, player_id=bye.id)
+        games = Game.objects.bulk_create([
+            Game(ply1_id=white.id, ply2_id=black.id, tournament=tournament, round=round_id)
+            for white, black in pairs
+        ], batch_size=1000)
+        # bulk_create skips the signals that keep standings current.
+        rebuild_and_publish(tournament, from_round=round_id)
+    return round_id, games, bye
@@ -0,0 +1,108 @@
+import asyncio
+import json
+import threading
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+CHANNEL = "leaderboard"
+QUEUE_SIZE = 100
+
+
+class InMemorySubscription:
+    def __init__(self, backend, channel):
+        self.backend = backend
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def deliver(self, message):
+        if self.queue.full():
+            # A subscriber this far behind must reload the full leaderboard.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            message = {"type": "reset"}
+        self.queue.put_nowait(message)
+
+    async def get(self):
+        return await self.queue.get()
+
+    async def close(self):
+        self.backend.unsubscribe(self)
+
+
+class InMemoryBackend:
+    """Fans messages out to subscribers in this process only."""
+
+    def __init__(self):
+        self.subscribers = {}
+        self.lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = InMemorySubscription(self, channel)
+        with self.lock:
+            self.subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscribers.get(subscription.channel, set()).discard(subscription)
+
+    def publish(self, channel, message):
+        with self.lock:
+            subscribers = list(self.subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:  # the subscriber's event loop has gone away
+                self.unsubscribe(subscription)
+
+
+class RedisSubscription:
+    def __init__(self, url, channel):
+        import redis.asyncio
+
+        self.client = redis.asyncio.Redis.from_url(url)
+        self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self.channel = channel
+        self.subscribed = False
+
+    async def get(self):
+        if not self.subscribed:
+            await self.pubsub.subscribe(self.channel)
+            self.subscribed = True
+        while True:
+            message = await self.pubsub.get_message(timeout=None)
+            if message is not None:
+                return json.loads(message["data"])
+
+    async def close(self):
+        await self.pubsub.aclose()
+        await self.client.aclose()
+
+
+class RedisBackend:
+    """Shares messages between every worker process through Redis pub/sub."""
+
+    def __init__(self):
+        import redis
+
+        self.url = settings.REDIS_URL
+        self.client = redis.Redis.from_url(self.url)
+
+    def subscribe(self, channel):
+        return RedisSubscription(self.url, channel)
+
+    def publish(self, channel, message):
+        self.client.publish(channel, json.dumps(message))
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = import_string(settings.LEADERBOARD_PUBSUB_BACKEND)()
+        return _backend
@@ -0,0 +1,175 @@
+"""
+Local Glicko-2 ratings from the games stored here.
+
+Rating periods are tournament rounds ordered by (tournament id, round).
+RatingHistory keeps each player's rating after every round they played and
+PlayerRating their latest one. ``update_ratings`` recomputes from a given
+period onwards and resumes everyone else from what is stored.
+"""
+
+from bisect import bisect_left
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from featured_games.models import Game
+from players.models import PlayerStats
+from . import glicko
+from .engine import POINTS
+from .models import PlayerRating, RatingHistory
+
+
+def display_ratings(player_ids):
+    """Map player ids to the rating shown for them under RATING_SOURCE."""
+    if settings.RATING_SOURCE == "local":
+        rows = PlayerRating.objects.filter(player_id__in=player_ids).values_list("player_id", "rating")
+        return {player_id: round(rating) for player_id, rating in rows}
+    return dict(
+        PlayerStats.objects.filter(player_id__in=player_ids).values_list("player_id", "rapid_rating")
+    )
+
+
+def rated_games(since=None):
+    games = Game.objects.filter(tournament__isnull=False, result__in=list(POINTS))
+    if since is not None:
+        games = games.filter(after(since))
+    return games
+
+
+def after(period):
+    """Rows from rating period ``period`` = (tournament id, round) onwards."""
+    tournament_id, round_id = period
+    return Q(tournament_id__gt=tournament_id) | Q(tournament_id=tournament_id, round__gte=round_id)
+
+
+def load_state(since, player_ids):
+    """State going into ``since`` for ``player_ids`` and for everyone rated from ``since`` on.
+
+    Maps player id to (rating, rd, volatility, games, period of their last
+    rating). Also returns the players who have rating history from ``since``
+    on, whose stored ratings are about to be replaced.
+    """
+    state = {}
+    touched = set(
+        RatingHistory.objects.filter(after(since)).values_list("player_id", flat=True).distinct()
+    )
+    # Players new to these periods resume from their latest rating; nobody else is loaded.
+    latest = PlayerRating.objects.filter(player_id__in=set(player_ids) - touched).values_list(
+        "player_id", "rating", "rd", "volatility", "games", "tournament_id", "round"
+    )
+    for player_id, rating, rd, volatility, games, tournament_id, round_id in latest:
+        state[player_id] = (rating, rd, volatility, games, (tournament_id, round_id))
+    # Players with history from ``since`` on resume from their last earlier round.
+    earlier = (
+        RatingHistory.objects.filter(player_id__in=touched)
+        .exclude(after(since))
+        .order_by("tournament_id", "round")
+        .values_list("player_id", "rating", "rd", "volatility", "games", "tournament_id", "round")
+    )
+    totals = {}
+    for player_id, rating, rd, volatility, games, tournament_id, round_id in earlier:
+        totals[player_id] = totals.get(player_id, 0) + games
+        state[player_id] = (rating, rd, volatility, totals[player_id], (tournament_id, round_id))
+    return state, touched
+
+
+def update_ratings(since=None):
+    """Recompute ratings for every round from ``since`` = (tournament id, round) on.
+
+    With ``since`` None every rating is rebuilt from scratch. Returns the
+    number of rounds rated.
+    """
+    games = list(
+        rated_games(since)
+        .order_by("tournament_id", "round")
+        .values_list("tournament_id", "round", "ply1_id", "ply2_id", "result")
+    )
+    if since is None:
+        state, touched = {}, set(PlayerRating.objects.values_list("player_id", flat=True))
+        periods = rated_games()
+    else:
+        state, touched = load_state(since, {g[2] for g in games} | {g[3] for g in games})
+        # Idle periods are counted from each player's last rating, so list periods from the earliest one.
+        periods = rated_games(min([since, *(values[4] for values in state.values())]))
+    periods = sorted(set(periods.values_list("tournament_id", "round").distinct()))
+
+    player_ids = np.array(sorted(set(state) | {g[2] for g in games} | {g[3] for g in games}), dtype=np.int64)
+    count = len(player_ids)
+    rating = np.full(count, glicko.INITIAL_RATING)
+    rd = np.full(count, glicko.INITIAL_RD)
+    volatility = np.full(count, glicko.INITIAL_VOLATILITY)
+    played = np.zeros(count, dtype=np.int64)
+    last = np.full(count, -1, dtype=np.int64)
+    if state:
+        index = np.searchsorted(player_ids, list(state))
+        rating[index], rd[index], volatility[index], played[index] = np.array(
+            [values[:4] for values in state.values()]
+        ).T
+        last[index] = [bisect_left(periods, values[4]) for values in state.values()]
+
+    history = []
+    start = 0
+    while start < len(games):
+        period = games[start][:2]
+        end = start
+        while end < len(games) and games[end][:2] == period:
+            end += 1
+        chunk = games[start:end]
+        start = end
+
+        white = np.searchsorted(player_ids, [g[2] for g in chunk])
+        black = np.searchsorted(player_ids, [g[3] for g in chunk])
+        white_points = np.array([POINTS[g[4]][0] for g in chunk])
+        players = np.concatenate([white, black])
+        opponents = np.concatenate([black, white])
+        scores = np.concatenate([white_points, 1 - white_points])
+
+        position = bisect_left(periods, period)
+        rd_in = rd.copy()
+        rd_in[players] = glicko.idle_deviation(
+            rd[players], volatility[players], np.maximum(position - last[players] - 1, 0)
+        )
+        active, new_rating, new_rd, new_volatility = glicko.rate_period(
+            rating, rd_in, volatility, players, opponents, scores
+        )
+        games_played = np.bincount(players, minlength=count)[active]
+        rating[active], rd[active], volatility[active] = new_rating, new_rd, new_volatility
+        played[active] += games_played
+        last[active] = position
+        history.extend(
+            RatingHistory(
+                tournament_id=period[0], round=period[1], player_id=player_id,
+                rating=r, rd=d, volatility=v, games=n,
+            )
+            for player_id, r, d, v, n in zip(
+                player_ids[active].tolist(), new_rating.tolist(), new_rd.tolist(),
+                new_volatility.tolist(), games_played.tolist(),
+            )
+        )
+
+    # Only players who played from ``since`` on, or lost games there, are loaded and change.
+    first = 0 if since is None else bisect_left(periods, since)
+    current = [
+        PlayerRating(
+            player_id=player_id, rating=r, rd=d, volatility=v, games=n,
+            tournament_id=periods[position][0], round=periods[position][1],
+        )
+        for player_id, r, d, v, n, position in zip(
+            player_ids.tolist(), rating.tolist(), rd.tolist(), volatility.tolist(), played.tolist(), last.tolist()
+        )
+        if position >= 0 and (position >= first or player_id in touched)
+    ]
+    with transaction.atomic():
+        stale = RatingHistory.objects.all() if since is None else RatingHistory.objects.filter(after(since))
+        stale.delete()
+        RatingHistory.objects.bulk_create(history, batch_size=1000)
+        # Players whose only rated games were removed no longer have a rating.
+        PlayerRating.objects.filter(player_id__in=touched - {r.player_id for r in current}).delete()
+        PlayerRating.objects.bulk_create(
+            current,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["player"],
+            update_fields=["rating", "rd", "volatility", "games", "tournament", "round"],
+        )
+    return len({(h.tournament_id, h.round) for h in history})
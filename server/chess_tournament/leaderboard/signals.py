@@ -0,0 +1,53 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from featured_games.models import Game
+from players.models import Player
+from .cache import invalidate
+from .models import Tournament
+from .updates import schedule
+
+
+@receiver(pre_save, sender=Game)
+def remember_previous_position(sender, instance, **kwargs):
+    # A game moved to another round or tournament also invalidates its old spot.
+    instance._previous_position = None
+    if instance.pk:
+        instance._previous_position = (
+            Game.objects.filter(pk=instance.pk).values_list("tournament_id", "round").first()
+        )
+
+
+@receiver(post_save, sender=Game)
+def update_standings_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if instance.tournament_id:
+        schedule(instance.tournament_id, instance.round)
+    previous = getattr(instance, "_previous_position", None)
+    if previous and previous[0]:
+        schedule(*previous)
+
+
+@receiver(post_delete, sender=Game)
+def update_standings_on_delete(sender, instance, **kwargs):
+    if instance.tournament_id:
+        schedule(instance.tournament_id, instance.round)
+
+
+@receiver(post_delete, sender=Tournament)
+def recompute_ratings(sender, **kwargs):
+    # Its games lost their tournament, so every later rating may change.
+    schedule()
+
+
+@receiver(post_save, sender=Tournament)
+def invalidate_tournament(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate(Tournament.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Player)
+def invalidate_player_tournaments(sender, instance, raw=False, **kwargs):
+    # Names are shown on the leaderboard.
+    if not raw:
+        invalidate(Tournament.objects.filter(standings__player=instance))
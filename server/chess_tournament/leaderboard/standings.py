@@ -0,0 +1,72 @@
+from django.db import transaction
+from featured_games.models import Game
+from . import engine
+from .cache import invalidate
+from .models import Standing, Tournament
+from .ratings import display_ratings
+
+
+def compute_standings(tournament, games, player_ids, ratings, from_round=None):
+    """Build Standing rows for every round in ``games`` (or only from ``from_round`` on).
+
+    ``games`` holds (round, ply1_id, ply2_id, result) tuples. Every round
+    lists every player; ``ratings`` is only stored for display.
+    """
+    tables = engine.compute(games, player_ids)
+    standings = []
+    for r, round_id in enumerate(tables.rounds.tolist()):
+        if from_round is not None and round_id < from_round:
+            continue
+        columns = zip(
+            tables.players.tolist(),
+            tables.score[r].tolist(),
+            tables.round_points[r].tolist(),
+            tables.buchholz[r].tolist(),
+            tables.sonneborn_berger[r].tolist(),
+            tables.progressive[r].tolist(),
+            tables.rank[r].tolist(),
+        )
+        standings.extend(
+            Standing(
+                tournament=tournament,
+                round=round_id,
+                player_id=player_id,
+                score=score,
+                round_points=round_points,
+                buchholz=buchholz,
+                sonneborn_berger=sonneborn_berger,
+                progressive=progressive,
+                rank=rank,
+                rating=ratings.get(player_id, 0),
+            )
+            for player_id, score, round_points, buchholz, sonneborn_berger, progressive, rank in columns
+        )
+    return standings
+
+
+def rebuild_standings(tournament, from_round=None):
+    """Recompute the tournament's standings from ``from_round`` onwards.
+
+    Earlier rounds cannot change and are kept. The whole table is rebuilt
+    when ``from_round`` is None or the set of players in the tournament has
+    changed, because every round lists every player. Returns the new rows
+    and the round they were rebuilt from, None after a full rebuild.
+    """
+    games = list(
+        Game.objects.filter(tournament=tournament)
+        .values_list("round", "ply1_id", "ply2_id", "result")
+    )
+    player_ids = {g[1] for g in games} | {g[2] for g in games}
+    existing = Standing.objects.filter(tournament=tournament)
+    if from_round is not None and set(existing.values_list("player_id", flat=True).distinct()) != player_ids:
+        from_round = None
+
+    ratings = display_ratings(player_ids)
+    standings = compute_standings(tournament, games, player_ids, ratings, from_round) if games else []
+
+    with transaction.atomic():
+        stale = existing if from_round is None else existing.filter(round__gte=from_round)
+        stale.delete()
+        Standing.objects.bulk_create(standings, batch_size=1000)
+        invalidate(Tournament.objects.filter(pk=tournament.pk))
+    return standings, from_round
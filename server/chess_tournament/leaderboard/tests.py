@@ -1,3 +1,386 @@
-from django.test import TestCase
+import random
+from io import StringIO
+from collections import Counter
+from unittest.mock import patch
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
-# Create your tests here.
+from featured_games.models import Game
+from players.models import Player
+from . import updates
+from .models import Bye, PlayerRating, RatingHistory, Standing, Tournament
+from .pairing import Entrant, create_round, load_entrants, pair
+from .ratings import update_ratings
+from .standings import rebuild_standings
+
+RESULTS = ['1-0', '0-1', '1/2-1/2']
+
+
+def make_players(count, prefix='p'):
+    return Player.objects.bulk_create(
+        Player(name=f'{prefix}{i}', chess_id=f'{prefix}{i}', player_class='Beginner') for i in range(count)
+    )
+
+
+def make_tournament(players, rounds, name='Open', active=False):
+    """A tournament where board i of round r pairs players[i] with players[i + r], without signals."""
+    tournament = Tournament.objects.create(name=name, currently_active=active)
+    half = len(players) // 2
+    games = []
+    for round_id in range(1, rounds + 1):
+        for board in range(half):
+            white = players[board]
+            black = players[half + (board + round_id - 1) % half]
+            games.append(Game(
+                ply1=white, ply2=black, tournament=tournament, round=round_id,
+                result=RESULTS[(board + round_id) % 3],
+            ))
+    Game.objects.bulk_create(games)
+    return tournament
+
+
+def rating_snapshot():
+    return {
+        r.player_id: (round(r.rating, 6), round(r.rd, 6), round(r.volatility, 9), r.games, r.tournament_id, r.round)
+        for r in PlayerRating.objects.all()
+    }
+
+
+def history_snapshot():
+    return set(RatingHistory.objects.values_list('tournament_id', 'round', 'player_id', 'games'))
+
+
+class RatingUpdateTests(TestCase):
+    def setUp(self):
+        self.players = make_players(10)
+        self.first = make_tournament(self.players, 4, name='First')
+        self.second = make_tournament(self.players[:6], 3, name='Second')
+        update_ratings()
+
+    def test_incremental_update_matches_full_recompute(self):
+        game = Game.objects.filter(tournament=self.first, round=2, result='1-0').first()
+        Game.objects.filter(pk=game.pk).update(result='0-1')
+        update_ratings((self.first.id, 2))
+        incremental = rating_snapshot(), history_snapshot()
+        update_ratings()
+        self.assertEqual(incremental, (rating_snapshot(), history_snapshot()))
+
+    def test_removed_round_matches_full_recompute(self):
+        Game.objects.filter(tournament=self.second, round=3).delete()
+        update_ratings((self.second.id, 3))
+        incremental = rating_snapshot(), history_snapshot()
+        update_ratings()
+        self.assertEqual(incremental, (rating_snapshot(), history_snapshot()))
+
+    def test_update_only_loads_ratings_of_affected_players(self):
+        bystanders = make_players(30, prefix='b')
+        make_tournament(bystanders, 1, name='Side event')
+        update_ratings()
+        before = rating_snapshot()
+        late = make_tournament(self.players[:4], 1, name='Late')
+
+        with CaptureQueriesContext(connection) as queries:
+            update_ratings((late.id, 1))
+        rating_reads = [
+            q['sql'] for q in queries.captured_queries
+            if q['sql'].startswith('SELECT') and 'leaderboard_playerrating' in q['sql']
+        ]
+        self.assertTrue(rating_reads)
+        for sql in rating_reads:
+            self.assertIn('"player_id" IN', sql)
+            self.assertNotIn('NOT', sql)
+        after = rating_snapshot()
+        changed = {pid for pid in after if after[pid] != before.get(pid)}
+        self.assertEqual(changed, {p.id for p in self.players[:4]})
+
+
+@override_settings(LEADERBOARD_UPDATE_DELAY=60)
+class ScheduledUpdateTests(TestCase):
+    def setUp(self):
+        self.players = make_players(8)
+        self.tournament = make_tournament(self.players, 3)
+        update_ratings()
+        rebuild_standings(self.tournament)
+
+    def tearDown(self):
+        updates.process_pending()
+
+    def test_game_writes_wait_for_commit_and_the_timer(self):
+        with patch('leaderboard.updates.update_ratings') as rate:
+            with self.captureOnCommitCallbacks(execute=True):
+                Game.objects.create(
+                    ply1=self.players[0], ply2=self.players[7], tournament=self.tournament, round=4, result='1-0'
+                )
+                self.assertEqual(updates._pending, {})
+            rate.assert_not_called()
+            self.assertEqual(updates._pending, {self.tournament.id: 4})
+        updates.process_pending()
+        self.assertEqual(Standing.objects.filter(tournament=self.tournament, round=4).count(), 8)
+        self.assertTrue(RatingHistory.objects.filter(tournament=self.tournament, round=4).exists())
+
+    def test_queryset_delete_is_coalesced_into_one_recompute(self):
+        with patch('leaderboard.updates.update_ratings') as rate, \
+                patch('leaderboard.updates.rebuild_and_publish') as rebuild:
+            with self.captureOnCommitCallbacks(execute=True):
+                Game.objects.filter(tournament=self.tournament, round__gte=2).delete()
+            updates.process_pending()
+        rate.assert_called_once_with((self.tournament.id, 2))
+        rebuild.assert_called_once_with(self.tournament, from_round=2)
+
+    def test_rolled_back_writes_are_not_queued(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                Game.objects.filter(tournament=self.tournament, round=3).delete()
+                raise RuntimeError('rolled back')
+        self.assertEqual(updates._pending, {})
+
+    def test_failed_recompute_is_kept_for_the_next_run(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Game.objects.filter(tournament=self.tournament, round=3).delete()
+        with patch('leaderboard.updates.update_ratings', side_effect=RuntimeError('boom')), \
+                self.assertLogs('leaderboard.updates', 'ERROR'):
+            with self.assertRaises(RuntimeError):
+                updates.process_pending()
+        self.assertEqual(updates._pending, {self.tournament.id: 3})
+        updates.process_pending()
+        self.assertFalse(Standing.objects.filter(tournament=self.tournament, round=3).exists())
+
+
+@override_settings(LEADERBOARD_UPDATE_DELAY=60)
+class LiveDeltaTests(TestCase):
+    def setUp(self):
+        self.players = make_players(8)
+        self.tournament = make_tournament(self.players, 7, active=True)
+        rebuild_standings(self.tournament)
+        backend = patch('leaderboard.live.get_backend')
+        self.backend = backend.start().return_value
+        self.addCleanup(backend.stop)
+
+    def publish_pending(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            updates.process_pending()
+        self.assertEqual(self.backend.publish.call_count, 1)
+        return self.backend.publish.call_args.args[1]
+
+    def test_deleting_the_last_round_only_removes_its_rows(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Game.objects.filter(tournament=self.tournament, round=7).delete()
+        message = self.publish_pending()
+
+        self.assertEqual(message['changes'], [])
+        self.assertEqual(
+            sorted((row['round'], row['player']) for row in message['removed']),
+            sorted((7, p.id) for p in self.players),
+        )
+        self.assertEqual(Standing.objects.filter(tournament=self.tournament).count(), 6 * 8)
+
+    def test_changed_result_only_publishes_later_rounds(self):
+        game = Game.objects.get(tournament=self.tournament, round=5, ply1=self.players[0])
+        game.result = '0-1' if game.result != '0-1' else '1-0'
+        with self.captureOnCommitCallbacks(execute=True):
+            game.save()
+        message = self.publish_pending()
+
+        self.assertEqual(message['removed'], [])
+        self.assertTrue(message['changes'])
+        self.assertTrue(all(row['round'] >= 5 for row in message['changes']))
+
+
+@override_settings(RATING_SOURCE='local')
+class LeaderboardModeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.players = make_players(8)
+        self.tournament = make_tournament(self.players, 4, active=True)
+        rebuild_standings(self.tournament)
+
+    def test_round_must_be_an_integer(self):
+        response = self.client.get('/leaderboard/points/', {'round': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'round must be an integer'})
+
+    def test_changes_for_one_round_only_list_the_players_it_mentions(self):
+        data = self.client.get('/leaderboard/points/', {'mode': 'changes', 'round': 3}).json()
+        self.assertEqual(list(data['standings']), ['3'])
+        entries = data['standings']['3']
+        self.assertEqual(len(data['players']), len(entries))
+        self.assertLess(len(entries), len(self.players))
+        rows = Standing.objects.filter(tournament=self.tournament).values_list('round', 'player_id', 'rank', 'score')
+        previous = {pid: (rank, score) for round_id, pid, rank, score in rows if round_id == 2}
+        current = {pid: (rank, score) for round_id, pid, rank, score in rows if round_id == 3}
+        moved = {pid for pid in current if current[pid] != previous[pid]}
+        self.assertEqual({data['players'][entry[0]]['id'] for entry in entries}, moved)
+
+    def test_unknown_round_keeps_the_response_shape(self):
+        compact = self.client.get('/leaderboard/points/', {'mode': 'compact'}).json()
+        for mode in ('compact', 'changes'):
+            with self.subTest(mode=mode):
+                data = self.client.get('/leaderboard/points/', {'mode': mode, 'round': 999}).json()
+                self.assertEqual(data.keys(), compact.keys())
+                self.assertEqual((data['mode'], data['columns']), (mode, compact['columns']))
+                self.assertEqual((data['rounds'], data['players'], data['standings']), ([], [], {}))
+                self.assertIsNone(data['currentleader'])
+        full = self.client.get('/leaderboard/points/', {'round': 999}).json()
+        self.assertEqual((full['rounds'], full['players']), ([], {}))
+
+    def test_compact_mode_indexes_every_player(self):
+        data = self.client.get('/leaderboard/points/', {'mode': 'compact'}).json()
+        self.assertEqual(len(data['players']), len(self.players))
+        for entries in data['standings'].values():
+            self.assertEqual(sorted(entry[0] for entry in entries), list(range(len(self.players))))
+
+
+@override_settings(RATING_SOURCE='local')
+class LeaderboardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.players = make_players(6)
+        self.tournament = make_tournament(self.players, 2, active=True)
+        rebuild_standings(self.tournament)
+
+    def get(self, **headers):
+        return self.client.get('/leaderboard/points/', **headers)
+
+    def test_unchanged_leaderboard_is_served_from_cache_and_revalidated(self):
+        etag = self.get()['ETag']
+        with self.assertNumQueries(1):
+            response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_rebuild_elsewhere_invalidates_every_cache(self):
+        # A rebuild on another worker's timer never touches this process's cache.
+        first = self.get()
+        game = Game.objects.filter(tournament=self.tournament, round=2).first()
+        Game.objects.filter(pk=game.pk).update(result='0-1' if game.result == '1-0' else '1-0')
+        rebuild_standings(self.tournament, from_round=2)
+
+        second = self.get(HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertNotEqual(second.json()['players'], first.json()['players'])
+
+    def test_renaming_a_player_invalidates_their_tournaments(self):
+        other = make_tournament(make_players(2, prefix='q'), 1, name='Other')
+        rebuild_standings(other)
+        versions = dict(Tournament.objects.values_list('id', 'version'))
+        self.get()
+        player = self.players[0]
+        player.name = 'Renamed'
+        player.save()
+        self.assertEqual(Tournament.objects.get(pk=other.pk).version, versions[other.pk])
+        self.assertIn('Renamed', str(self.get().json()['players']))
+
+
+def check_pairings(test, rounds, field):
+    """Assert the Swiss rules over ``rounds`` = [(pairs of ids, bye id or None), ...]."""
+    met = set()
+    colours = {player_id: '' for player_id in field}
+    byes = Counter()
+    for number, (pairs, bye) in enumerate(rounds, start=1):
+        seated = [player_id for board in pairs for player_id in board] + ([bye] if bye else [])
+        test.assertCountEqual(seated, field, f'round {number}: everyone seated exactly once')
+        for white, black in pairs:
+            test.assertNotIn(frozenset((white, black)), met, f'round {number}: rematch')
+            met.add(frozenset((white, black)))
+            colours[white] += 'W'
+            colours[black] += 'B'
+        if bye:
+            byes[bye] += 1
+    for player_id, history in colours.items():
+        test.assertLessEqual(abs(history.count('W') - history.count('B')), 2, history)
+        test.assertNotIn('WWW', history)
+        test.assertNotIn('BBB', history)
+    test.assertLessEqual(max(byes.values(), default=0), 1)
+
+
+class PairingTests(TestCase):
+    def play_round(self, tournament, round_id, rng):
+        for game in Game.objects.filter(tournament=tournament, round=round_id):
+            Game.objects.filter(pk=game.pk).update(result=rng.choice(RESULTS))
+
+    def stored_rounds(self, tournament):
+        rounds = []
+        byes = dict(Bye.objects.filter(tournament=tournament).values_list('round', 'player_id'))
+        for round_id in sorted(set(Game.objects.filter(tournament=tournament).values_list('round', flat=True))):
+            pairs = list(
+                Game.objects.filter(tournament=tournament, round=round_id).values_list('ply1_id', 'ply2_id')
+            )
+            rounds.append((pairs, byes.get(round_id)))
+        return rounds
+
+    def test_seeded_tournament_follows_the_swiss_rules(self):
+        rng = random.Random(7)
+        players = make_players(15)
+        field = [p.id for p in players]
+        tournament = Tournament.objects.create(name='Swiss', currently_active=False)
+
+        for round_id in range(1, 8):
+            number, games, bye = create_round(tournament, field if round_id == 1 else None)
+            self.assertEqual(number, round_id)
+            self.assertEqual(len(games), 7)
+            self.assertIsNotNone(bye)
+            self.play_round(tournament, round_id, rng)
+
+        check_pairings(self, self.stored_rounds(tournament), field)
+        self.assertEqual(Bye.objects.filter(tournament=tournament).count(), 7)
+        entrants, last_round = load_entrants(tournament)
+        self.assertEqual(last_round, 7)
+        self.assertEqual(sorted(e.byes for e in entrants), [0] * 8 + [1] * 7)
+        self.assertEqual(Standing.objects.filter(tournament=tournament, round=7).count(), 15)
+
+    def test_byes_are_recorded_not_inferred(self):
+        players = make_players(4)
+        tournament = make_tournament(players, 1)
+        # A late entrant missed round 1 without being given a bye.
+        late = make_players(1, prefix='late')[0]
+        tournament.entrants.set([p.id for p in players] + [late.id])
+        entrants, _ = load_entrants(tournament)
+        self.assertEqual({e.id: e.byes for e in entrants}[late.id], 0)
+
+    def test_repairing_a_round_replaces_its_bye(self):
+        players = make_players(5)
+        tournament = Tournament.objects.create(name='Swiss', currently_active=False)
+        create_round(tournament, [p.id for p in players])
+        Game.objects.filter(tournament=tournament, round=1).delete()
+        _, _, bye = create_round(tournament)
+        self.assertEqual(list(Bye.objects.filter(tournament=tournament).values_list('round', 'player_id')), [(1, bye.id)])
+
+    def test_in_memory_pairing_over_a_large_field(self):
+        rng = random.Random(3)
+        field = list(range(1, 102))
+        ratings = {pid: rng.randint(800, 2400) for pid in field}
+        scores = dict.fromkeys(field, 0.0)
+        opponents = {pid: set() for pid in field}
+        colours = dict.fromkeys(field, '')
+        byes = Counter()
+        rounds = []
+        for _ in range(9):
+            boards, bye = pair([
+                Entrant(pid, scores[pid], ratings[pid], frozenset(opponents[pid]), colours[pid], byes[pid])
+                for pid in field
+            ])
+            pairs = [(white.id, black.id) for white, black in boards]
+            for white, black in pairs:
+                points = rng.choice([1.0, 0.5, 0.0])
+                scores[white] += points
+                scores[black] += 1 - points
+                opponents[white].add(black)
+                opponents[black].add(white)
+                colours[white] += 'W'
+                colours[black] += 'B'
+            byes[bye.id] += 1
+            rounds.append((pairs, bye.id))
+        check_pairings(self, rounds, field)
+
+    def test_pair_round_command_checks_its_input(self):
+        tournament = Tournament.objects.create(name='Swiss', currently_active=False)
+        with self.assertRaisesMessage(CommandError, 'pass --players'):
+            call_command('pair_round', tournament=tournament.id, stdout=StringIO())
+        players = make_players(4)
+        call_command('pair_round', tournament=tournament.id, players=','.join(str(p.id) for p in players),
+                     stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, 'still have no result'):
+            call_command('pair_round', tournament=tournament.id, stdout=StringIO())
@@ -0,0 +1,94 @@
+"""
+Coalesced recomputation of ratings and standings after game writes.
+
+Game and Tournament signals only record which (tournament, round) changed.
+Once the transaction commits, the change is queued, and a background timer
+calls ``process_pending`` LEADERBOARD_UPDATE_DELAY seconds later. Everything
+queued by then, e.g. every row of one queryset delete, is handled by a
+single ``update_ratings`` call and one standings rebuild per tournament, so
+requests that write games never wait for either.
+"""
+
+import atexit
+import logging
+import threading
+from django.conf import settings
+from django.db import connections, transaction
+from .live import rebuild_and_publish
+from .models import Tournament
+from .ratings import update_ratings
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_run_lock = threading.Lock()  # one recompute at a time
+_pending = {}  # tournament id -> earliest changed round
+_rerate_all = False
+_timer = None
+
+
+def schedule(tournament_id=None, round_id=1):
+    """Queue a recompute from ``round_id`` of ``tournament_id`` once the current transaction commits.
+
+    With no tournament every rating is recomputed from scratch.
+    """
+    transaction.on_commit(lambda: enqueue(tournament_id, round_id))
+
+
+def enqueue(tournament_id, round_id):
+    global _rerate_all, _timer
+    with _lock:
+        if tournament_id is None:
+            _rerate_all = True
+        else:
+            _pending[tournament_id] = min(round_id, _pending.get(tournament_id, round_id))
+        if _timer is None:
+            _timer = threading.Timer(settings.LEADERBOARD_UPDATE_DELAY, process_in_background)
+            _timer.daemon = True
+            _timer.start()
+
+
+def process_pending():
+    """Recompute ratings and standings for everything queued. Returns the tournaments rebuilt."""
+    global _pending, _rerate_all, _timer
+    with _run_lock:
+        with _lock:
+            pending, rerate_all = _pending, _rerate_all
+            _pending, _rerate_all = {}, False
+            if _timer is not None:
+                _timer.cancel()
+                _timer = None
+        if not pending and not rerate_all:
+            return []
+        try:
+            update_ratings(None if rerate_all else min(pending.items()))
+            tournaments = list(Tournament.objects.filter(id__in=pending))
+            for tournament in tournaments:
+                rebuild_and_publish(tournament, from_round=pending[tournament.id])
+        except Exception:
+            logger.exception("Could not update tournaments %s; keeping them for the next run", list(pending))
+            restore(pending, rerate_all)
+            raise
+    return tournaments
+
+
+def restore(pending, rerate_all):
+    # No new timer: the next game write, or process exit, retries.
+    global _rerate_all
+    with _lock:
+        _rerate_all = _rerate_all or rerate_all
+        for tournament_id, round_id in pending.items():
+            _pending[tournament_id] = min(round_id, _pending.get(tournament_id, round_id))
+
+
+def process_in_background():
+    try:
+        process_pending()
+    except Exception:
+        pass  # already logged and requeued
+    finally:
+        connections.close_all()
+
+
+# Commands and scripts that write games usually exit before the timer fires.
+atexit.register(process_in_background)
@@ -3,4 +3,5 @@ from . import views
 
 urlpatterns = [
     path('points/', views.get_leaderboard),
+    path('stream/', views.stream_leaderboard),
 ]
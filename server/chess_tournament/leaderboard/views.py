@@ -1,115 +1,183 @@
-from collections import defaultdict
-import cloudscraper
+import asyncio
+import json
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from .models import Tournament
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.db.models.functions import Lower
+from chess_tournament.instrumentation import span
+from .cache import RESPONSE_TIMEOUT, etag_matches, make_etag, response_key
+from .models import Standing, Tournament
+from .live import refresh_stale_ratings
+from .pubsub import CHANNEL, get_backend
+from .standings import rebuild_standings
 from featured_games.models import Game
 
-scraper = cloudscraper.create_scraper()
-
-def fetch_rating(player, rating_cache):
-    if player.chess_id in rating_cache:
-        return rating_cache[player.chess_id]
-    
-    url = f"https://api.chess.com/pub/player/{player.chess_id}/stats"
-    response = scraper.get(url)
-    if response.status_code == 200:
-        rating = response.json().get("chess_rapid", {}).get("last", {}).get("rating", 0)
-        rating_cache[player.chess_id] = rating
-        return rating
-    rating_cache[player.chess_id] = 0
-    return 0
+MODES = ("full", "compact", "changes")
+COMPACT_COLUMNS = ["player", "rank", "score", "points"]
+
+def load_standings(tournament, round_id=None):
+    """Return (round, player_id, name, rank, score, round_points, rating, buchholz, sonneborn_berger) rows in display order."""
+    standings = Standing.objects.filter(tournament=tournament)
+    if round_id is not None:
+        standings = standings.filter(round=round_id)
+    rows = list(
+        standings.order_by("round", "rank", Lower("player__name"), "player_id")
+        .values_list(
+            "round", "player_id", "player__name", "rank", "score", "round_points", "rating",
+            "buchholz", "sonneborn_berger",
+        )
+    )
+    if not rows and round_id is None and Game.objects.filter(tournament=tournament).exists():
+        # Games entered before standings were tracked: backfill once.
+        rebuild_standings(tournament)
+        return load_standings(tournament)
+    return rows
+
+def parse_options(request):
+    mode = request.query_params.get("mode", "full")
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {', '.join(MODES)}")
+    round_id = request.query_params.get("round")
+    if round_id is not None:
+        try:
+            round_id = int(round_id)
+        except ValueError:
+            raise ValueError("round must be an integer") from None
+    return mode, round_id
 
 @api_view(['GET'])
 def get_leaderboard(request):
+    try:
+        mode, round_id = parse_options(request)
+    except ValueError as error:
+        return Response({"error": str(error)}, status=400)
+
     tournament = Tournament.objects.filter(currently_active=True).first()
     if not tournament:
         return Response({"error": "No active tournament"})
 
-    games = list(
-        Game.objects.filter(tournament=tournament)
-        .select_related('ply1', 'ply2')
-        .order_by('round', 'id')
-    )
-    if not games:
-        return Response({"rounds": [], "players": {}, "status": "success", "currentleader": None, "currenttournament": str(tournament.name)})
-
-    def get_game_scores(result):
-        if result == "1-0":
-            return 1.0, 0.0
-        if result == "0-1":
-            return 0.0, 1.0
-        if result == "1/2-1/2":
-            return 0.5, 0.5
-        # For pending/unknown results, award no points.
-        return 0.0, 0.0
-
-    rating_cache = {}
-    player_scores = defaultdict(float)  # cumulative score keyed by player.id
-    player_map = {}
-    games_by_round = defaultdict(list)
-    rounds = []
+    refresh_stale_ratings(tournament)
+    key = response_key(tournament.id, tournament.version, mode, round_id)
+    cached = cache.get(key)
+    if cached is None:
+        with span("leaderboard"):
+            data = build_leaderboard(tournament, mode, round_id)
+        cached = {"data": data, "etag": make_etag(data)}
+        cache.set(key, cached, RESPONSE_TIMEOUT)
+
+    headers = {"ETag": cached["etag"], "Cache-Control": "no-cache"}
+    if etag_matches(request, cached["etag"]):
+        return Response(status=304, headers=headers)
+    return Response(cached["data"], headers=headers)
+
+def performance(gained):
+    return f"+{gained:g}" if gained > 0 else "0"
+
+def build_leaderboard(tournament, mode="full", round_id=None):
+    # "changes" compares against the previous round, so it needs every round.
+    rows = load_standings(tournament, None if mode == "changes" else round_id)
+    if not rows:
+        if mode == "full":
+            return {"rounds": [], "players": {}, "status": "success", "currentleader": None, "currenttournament": str(tournament.name)}
+        return {
+            "mode": mode,
+            "columns": COMPACT_COLUMNS,
+            "rounds": [],
+            "players": [],
+            "standings": {},
+            "status": "success",
+            "currentleader": None,
+            "currenttournament": str(tournament.name)
+        }
 
-    for game in games:
-        games_by_round[game.round].append(game)
-        player_map[game.ply1.id] = game.ply1
-        player_map[game.ply2.id] = game.ply2
-
-    round_ids = sorted(games_by_round.keys())
-    rounds = [{"id": round_id, "name": f"Round {round_id}"} for round_id in round_ids]
-
-    all_player_ids = sorted(player_map.keys(), key=lambda pid: (player_map[pid].name.lower(), pid))
-    leaderboard = {}
-
-    for round_id in round_ids:
-        round_points = defaultdict(float)
-        for game in games_by_round[round_id]:
-            score1, score2 = get_game_scores(game.result)
-            player_scores[game.ply1.id] += score1
-            player_scores[game.ply2.id] += score2
-            round_points[game.ply1.id] += score1
-            round_points[game.ply2.id] += score2
-
-        round_name = f"Round {round_id}"
-        snapshot = []
-        for player_id in all_player_ids:
-            player = player_map[player_id]
-            gained = round_points[player_id]
-            performance = f"+{gained:g}" if gained > 0 else "0"
-            snapshot.append({
-                "rank": 1,
-                "name": player.name,
-                "rating": fetch_rating(player, rating_cache),
-                "score": player_scores[player_id],
-                "performance": performance,
+    rounds = []
+    for row in rows:
+        if not rounds or rounds[-1]["id"] != row[0]:
+            rounds.append({"id": row[0], "name": f"Round {row[0]}"})
+    last_round = rounds[-1]["id"]
+    current_leader = next(row[2] for row in rows if row[0] == last_round)
+
+    if mode == "full":
+        leaderboard = {}
+        for round_no, _, name, rank, score, gained, rating, buchholz, sonneborn_berger in rows:
+            leaderboard.setdefault(f"Round {round_no}", []).append({
+                "rank": rank,
+                "name": name,
+                "rating": rating,
+                "score": score,
+                "buchholz": buchholz,
+                "sonnebornBerger": sonneborn_berger,
+                "performance": performance(gained),
             })
-
-        # Deterministic ordering: score desc, rating desc, name asc.
-        snapshot.sort(key=lambda p: (-p["score"], -p["rating"], p["name"].lower()))
-
-        # Competition ranking: 1, 2, 2, 4
-        previous_score = None
-        previous_rating = None
-        previous_rank = 0
-        for index, row in enumerate(snapshot, 1):
-            score_key = row["score"]
-            rating_key = row["rating"]
-            if score_key == previous_score and rating_key == previous_rating:
-                row["rank"] = previous_rank
-            else:
-                row["rank"] = index
-                previous_rank = index
-                previous_score = score_key
-                previous_rating = rating_key
-
-        leaderboard[round_name] = snapshot
-
-    current_leader = leaderboard[rounds[-1]["name"]][0]["name"] if rounds else None
-
-    return Response({
+        return {
+            "rounds": rounds,
+            "players": leaderboard,
+            "status": "success",
+            "currentleader": current_leader,
+            "currenttournament": str(tournament.name)
+        }
+
+    details = {}
+    for _, player_id, name, _, _, _, rating, _, _ in rows:
+        details[player_id] = {"id": player_id, "name": name, "rating": rating}
+
+    standings = {}
+    previous = {}
+    for round_no, player_id, _, rank, score, gained, *_ in rows:
+        entries = standings.setdefault(str(round_no), [])
+        if mode == "changes":
+            if previous.get(player_id) == (rank, score):
+                continue
+            previous[player_id] = (rank, score)
+        entries.append([player_id, rank, score, gained])
+
+    if round_id is not None:
+        rounds = [r for r in rounds if r["id"] == round_id]
+        standings = {key: value for key, value in standings.items() if key == str(round_id)}
+        current_leader = next((row[2] for row in rows if row[0] == round_id), None)
+
+    # Compact modes send each player they mention once and refer to them by index.
+    index = {}
+    for entries in standings.values():
+        for entry in entries:
+            entry[0] = index.setdefault(entry[0], len(index))
+
+    return {
+        "mode": mode,
+        "columns": COMPACT_COLUMNS,
         "rounds": rounds,
-        "players": leaderboard,
+        "players": [details[player_id] for player_id in index],
+        "standings": standings,
         "status": "success",
         "currentleader": current_leader,
         "currenttournament": str(tournament.name)
-    })
+    }
+
+KEEPALIVE_SECONDS = 15
+
+async def leaderboard_events():
+    subscription = get_backend().subscribe(CHANNEL)
+    try:
+        yield "retry: 3000\n\n"
+        yield "event: ready\ndata: {}\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {message['type']}\ndata: {json.dumps(message)}\n\n"
+    finally:
+        await subscription.close()
+
+async def stream_leaderboard(request):
+    """Server-sent events with standings deltas for the active tournament.
+
+    Clients load /leaderboard/points/ once, then apply "delta" events and
+    reload on "reset". Needs an ASGI server (chess_tournament.asgi).
+    """
+    response = StreamingHttpResponse(leaderboard_events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Player
+from .models import Player, PlayerStats, OpeningStat, OpeningIndex
 
 admin.site.register(Player)
+admin.site.register(PlayerStats)
+admin.site.register(OpeningStat)
+admin.site.register(OpeningIndex)
 # Register your models here.
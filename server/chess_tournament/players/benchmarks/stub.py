@@ -0,0 +1,73 @@
+from contextlib import contextmanager
+from pathlib import Path
+from unittest import mock
+import httpx
+from django.conf import settings
+from players import chesscom_async
+
+FIXTURES = Path(__file__).resolve().parent / "chesscom"
+
+
+class StubChessCom:
+    """Serves recorded Chess.com responses and counts every outbound call."""
+
+    def __init__(self, fixtures=FIXTURES):
+        self.templates = {
+            name: (Path(fixtures) / f"{name}.json").read_text()
+            for name in ("stats", "archives", "games_month")
+        }
+        self.calls = 0
+        # Serves the synchronous scraper; dispatches through self.handle so it can be swapped.
+        self.client = httpx.Client(transport=httpx.MockTransport(lambda request: self.handle(request)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.client.close()
+
+    def body(self, url):
+        path = url.removeprefix(settings.CHESSCOM_API_ROOT).strip("/").split("/")
+        if len(path) < 3 or path[0] != "player":
+            return None
+        username = path[1]
+        if path[2:] == ["stats"]:
+            name = "stats"
+        elif path[2:] == ["games", "archives"]:
+            name = "archives"
+        elif len(path) == 5 and path[2] == "games":
+            name = "games_month"
+        else:
+            return None
+        text = self.templates[name].replace("{root}", settings.CHESSCOM_API_ROOT)
+        return text.replace("{username}", username)
+
+    def handle(self, request):
+        self.calls += 1
+        body = self.body(str(request.url))
+        if body is None:
+            return httpx.Response(404, json={"message": "not found"})
+        return httpx.Response(200, text=body, headers={"Content-Type": "application/json"})
+
+    def get(self, url, headers=None, **kwargs):
+        return self.client.get(url, headers=headers)
+
+    @contextmanager
+    def installed(self):
+        transport = httpx.MockTransport(self.handle)
+        real_client = httpx.AsyncClient
+
+        def client(**kwargs):
+            return real_client(**{**kwargs, "transport": transport})
+
+        # The shared client is reopened so it picks up the stub transport, and again afterwards.
+        chesscom_async.reset_client()
+        try:
+            with mock.patch.object(chesscom_async.httpx, "AsyncClient", client), \
+                    mock.patch("players.chesscom.scraper", self):
+                yield self
+        finally:
+            chesscom_async.reset_client()
@@ -0,0 +1,136 @@
+import re
+import time
+from datetime import datetime, timezone
+import cloudscraper
+import requests
+from cloudscraper.exceptions import CloudflareException
+from django.conf import settings
+from django.core.cache import caches
+from chess_tournament.instrumentation import span
+from . import resilience
+
+scraper = cloudscraper.create_scraper()
+
+MONTH_ARCHIVE_RE = re.compile(r"/games/(\d{4})/(\d{2})$")
+
+
+def stats_url(chess_id):
+    return f"{settings.CHESSCOM_API_ROOT}/player/{chess_id}/stats"
+
+
+def archives_url(chess_id):
+    return f"{settings.CHESSCOM_API_ROOT}/player/{chess_id}/games/archives"
+
+
+def get_cache(url):
+    # Monthly game archives are large, so they live in a separately bounded cache.
+    return caches["chesscom_archives" if MONTH_ARCHIVE_RE.search(url) else "chesscom"]
+
+
+def cache_key(url):
+    return url.removeprefix(settings.CHESSCOM_API_ROOT).lower()
+
+
+def is_closed_month(url):
+    """Whether ``url`` is the game archive of a month that has ended."""
+    month = MONTH_ARCHIVE_RE.search(url)
+    if month is None:
+        return False
+    now = datetime.now(timezone.utc)
+    return (int(month.group(1)), int(month.group(2))) < (now.year, now.month)
+
+
+def ttl_for(url):
+    ttls = settings.CHESSCOM_CACHE_TTL
+    if MONTH_ARCHIVE_RE.search(url):
+        return ttls["closed_month"] if is_closed_month(url) else ttls["current_month"]
+    if url.endswith("/stats"):
+        return ttls["stats"]
+    if url.endswith("/games/archives"):
+        return ttls["archives"]
+    return ttls["default"]
+
+
+def retention_for(ttl):
+    if ttl is None:
+        return None
+    return ttl + settings.CHESSCOM_CACHE_RETENTION
+
+
+def is_fresh(entry):
+    return entry["fresh_until"] is None or entry["fresh_until"] > time.time()
+
+
+def conditional_headers(entry):
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def make_entry(url, data, headers):
+    ttl = ttl_for(url)
+    return {
+        "data": data,
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+        "fresh_until": None if ttl is None else time.time() + ttl,
+    }
+
+
+def revalidated(url, entry):
+    ttl = ttl_for(url)
+    return {**entry, "fresh_until": None if ttl is None else time.time() + ttl}
+
+
+def entry_from_response(url, entry, response):
+    """Return the cache entry to store for a response, or None if it failed."""
+    if response.status_code == 304 and entry is not None:
+        return revalidated(url, entry)
+    if response.status_code == 200:
+        return make_entry(url, response.json(), response.headers)
+    return None
+
+
+def stale_data(entry):
+    return entry["data"] if entry is not None else None
+
+
+def get_json(url):
+    """Return the decoded JSON body for a Chess.com URL, or None on failure.
+
+    Responses are shared through the "chesscom" cache together with their
+    ETag/Last-Modified validators. Once an entry goes stale it is revalidated
+    with a conditional request and a 304 simply extends its freshness. While
+    Chess.com is failing the stale entry is served as it is.
+    """
+    cache = get_cache(url)
+    key = cache_key(url)
+    entry = cache.get(key)
+    if entry is not None and is_fresh(entry):
+        return entry["data"]
+    if not resilience.breaker_for(url).allow():
+        return stale_data(entry)
+
+    headers = conditional_headers(entry) if entry is not None else {}
+    with span("chesscom"):
+        response = resilience.call(
+            url,
+            lambda: scraper.get(url, headers=headers, timeout=resilience.timeouts()),
+            (requests.RequestException, CloudflareException),
+        )
+    if response is None:
+        return stale_data(entry)
+    entry = entry_from_response(url, entry, response)
+    if entry is None:
+        return None
+    cache.set(key, entry, retention_for(ttl_for(url)))
+    return entry["data"]
+
+
+def forget(urls):
+    """Drop cached responses for ``urls``, e.g. archives nobody will read again."""
+    for url in urls:
+        get_cache(url).delete(cache_key(url))
@@ -0,0 +1,219 @@
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+from urllib.parse import urlsplit
+import httpx
+from django.conf import settings
+from chess_tournament.instrumentation import span
+from . import chesscom, resilience
+
+
+class RateLimiter:
+    """Spaces out requests to each host and honours 429 back-off windows.
+
+    The bookkeeping uses a thread lock that is never held across an await,
+    so one limiter can be shared by clients on any event loop.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.next_slot = {}
+        self.blocked_until = {}
+        self.lock = threading.Lock()
+
+    async def wait(self, host):
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_slot.get(host, 0), self.blocked_until.get(host, 0))
+            self.next_slot[host] = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def block(self, host, seconds):
+        with self.lock:
+            self.blocked_until[host] = max(self.blocked_until.get(host, 0), time.monotonic() + seconds)
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def shared_limiter():
+    """The process-wide CHESSCOM_RATE_LIMIT limiter, so a 429 seen by one request pauses the rest."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter(settings.CHESSCOM_RATE_LIMIT)
+        return _limiter
+
+
+class ChessComClient:
+    """Asyncio Chess.com client sharing one keep-alive connection pool.
+
+    At most ``concurrency`` requests are in flight at once, and responses go
+    through the same "chesscom" cache as ``chesscom.get_json``. ``get_many``
+    uses one long-lived instance; see ``shared_client``.
+    """
+
+    def __init__(self, concurrency=None, rate=None, transport=None):
+        concurrency = concurrency or settings.CHESSCOM_CONCURRENCY
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.limiter = shared_limiter() if rate is None else RateLimiter(rate)
+        self.client = httpx.AsyncClient(
+            headers={"User-Agent": settings.CHESSCOM_USER_AGENT},
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+            timeout=httpx.Timeout(settings.CHESSCOM_READ_TIMEOUT, connect=settings.CHESSCOM_CONNECT_TIMEOUT),
+            transport=transport,
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+
+    async def request(self, url, headers):
+        """Send a GET with retries, returning the response or None if every attempt failed."""
+        host = urlsplit(url).netloc
+        breaker = resilience.breaker_for(url)
+        async with self.semaphore:
+            for attempt in range(settings.CHESSCOM_MAX_RETRIES + 1):
+                if attempt and not breaker.allow():
+                    return None
+                await self.limiter.wait(host)
+                try:
+                    with span("chesscom"):
+                        response = await self.client.get(url, headers=headers)
+                except httpx.TransportError:
+                    response = None
+                if response is not None and not resilience.should_retry(response):
+                    breaker.record_success()
+                    return response
+                breaker.record_failure()
+                # As in resilience.call, a wait beyond CHESSCOM_BACKOFF_MAX gives up instead.
+                delay = resilience.backoff(attempt, response)
+                if attempt == settings.CHESSCOM_MAX_RETRIES or delay > settings.CHESSCOM_BACKOFF_MAX:
+                    break
+                if response is not None and response.status_code == 429:
+                    # Pause every request to this host, not just this one.
+                    self.limiter.block(host, delay)
+                else:
+                    await asyncio.sleep(delay)
+        return None
+
+    async def get_json(self, url):
+        cache = chesscom.get_cache(url)
+        key = chesscom.cache_key(url)
+        entry = await cache.aget(key)
+        if entry is not None and chesscom.is_fresh(entry):
+            return entry["data"]
+        if not resilience.breaker_for(url).allow():
+            return chesscom.stale_data(entry)
+
+        headers = chesscom.conditional_headers(entry) if entry is not None else {}
+        try:
+            response = await self.request(url, headers)
+        except httpx.HTTPError:
+            response = None
+        if response is None:
+            return chesscom.stale_data(entry)
+        entry = chesscom.entry_from_response(url, entry, response)
+        if entry is None:
+            return None
+        await cache.aset(key, entry, chesscom.retention_for(chesscom.ttl_for(url)))
+        return entry["data"]
+
+    async def get_many(self, urls, concurrency=None, timeout=None):
+        """Fetch ``urls`` concurrently; results follow their order.
+
+        With ``timeout``, URLs still pending after that many seconds come back
+        as None. Their requests carry on and fill the cache for the next caller.
+        """
+        # A caller may ask for fewer requests in flight than the pool allows.
+        semaphore = asyncio.Semaphore(concurrency) if concurrency else None
+
+        async def fetch(url):
+            if semaphore is None:
+                return await self.get_json(url)
+            async with semaphore:
+                return await self.get_json(url)
+
+        tasks = [asyncio.ensure_future(fetch(url)) for url in urls]
+        if timeout is None:
+            return await asyncio.gather(*tasks)
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            _unfinished.add(task)
+            task.add_done_callback(_unfinished.discard)
+        return [None if task in pending else task.result() for task in tasks]
+
+
+# Requests left running by a timed-out get_many; the loop only keeps weak references.
+_unfinished = set()
+
+# Calls come from request threads and background workers, none of which keep
+# an event loop alive between calls, so a client per call or per loop would
+# rarely reuse a connection. Instead a daemon thread runs one loop for the
+# life of the process, and one client on it serves every call.
+_loop = None
+_client = None
+_client_lock = threading.Lock()
+
+
+def shared_client():
+    """Return (loop, client) for the process-wide client, starting them on first use."""
+    global _loop, _client
+    with _client_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="chesscom-client", daemon=True).start()
+        if _client is None:
+            _client = asyncio.run_coroutine_threadsafe(open_client(), _loop).result()
+        return _loop, _client
+
+
+async def open_client():
+    return ChessComClient()
+
+
+def reset_client():
+    """Close the shared client; the next call opens a new one."""
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        asyncio.run_coroutine_threadsafe(client.client.aclose(), _loop).result()
+
+
+async def in_context(context, coroutine):
+    # Run in the caller's context so request instrumentation still sees the calls.
+    return await asyncio.get_running_loop().create_task(coroutine, context=context)
+
+
+# Time for the client loop to hand back results once a get_many timeout has passed.
+RESULT_GRACE = 1.0
+
+
+def submit(urls, concurrency, timeout=None):
+    loop, client = shared_client()
+    coroutine = in_context(contextvars.copy_context(), client.get_many(urls, concurrency, timeout))
+    return asyncio.run_coroutine_threadsafe(coroutine, loop)
+
+
+def get_many(urls, concurrency=None, timeout=None):
+    """Fetch several Chess.com URLs concurrently; results follow ``urls`` order.
+
+    With ``timeout`` the caller waits at most that long, getting None for
+    every URL that has not been fetched by then.
+    """
+    urls = list(urls)
+    if not urls:
+        return []
+    future = submit(urls, concurrency, timeout)
+    try:
+        return future.result(None if timeout is None else timeout + RESULT_GRACE)
+    except FutureTimeout:
+        future.cancel()
+        return [None] * len(urls)
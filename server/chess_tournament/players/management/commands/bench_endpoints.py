@@ -0,0 +1,123 @@
+import json
+from io import StringIO
+import statistics
+import time
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import (
+    CaptureQueriesContext, setup_databases, setup_test_environment,
+    teardown_databases, teardown_test_environment,
+)
+
+from players.benchmarks.stub import StubChessCom
+
+# Budgets apply to warm requests: p95 latency, worst-case DB queries and
+# worst-case outbound Chess.com calls per request.
+DEFAULT_BUDGETS = {
+    "/players/details/": {"p95_ms": 300, "queries": 6, "http": 0},
+    "/players/details/<id>": {"p95_ms": 200, "queries": 12, "http": 2},
+    "/leaderboard/points/": {"p95_ms": 50, "queries": 2, "http": 0},
+    "/featured/games/": {"p95_ms": 100, "queries": 1, "http": 0},
+}
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the API endpoints on a seeded throwaway database with Chess.com stubbed out'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=200)
+        parser.add_argument('--tournaments', type=int, default=5)
+        parser.add_argument('--games', type=int, default=2000)
+        parser.add_argument('--rounds', type=int, default=7)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--budgets', help='JSON file overriding the default per-endpoint budgets')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        budgets = dict(DEFAULT_BUDGETS)
+        if options['budgets']:
+            with open(options['budgets']) as f:
+                budgets.update(json.load(f))
+
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            for cache in caches.all():
+                cache.clear()
+            # The stub needs no politeness delay between calls.
+            with StubChessCom() as stub, stub.installed(), override_settings(CHESSCOM_RATE_LIMIT=0):
+                call_command('seed_database', players=options['players'], tournaments=options['tournaments'],
+                             games=options['games'], rounds=options['rounds'], seed=options['seed'],
+                             stdout=StringIO())
+                call_command('sync_chess_stats', all=True, stdout=StringIO())
+                report = self.run_endpoints(stub, options['iterations'])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        failures = []
+        for endpoint, row in report.items():
+            budget = budgets.get(endpoint, {})
+            for metric, key in (("p95_ms", "p95_ms"), ("queries", "max_queries"), ("http", "max_http")):
+                if metric in budget and row[key] > budget[metric]:
+                    failures.append(f'{endpoint}: {key} {row[key]} > budget {budget[metric]}')
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.stdout.write(f'{"endpoint":<24}{"cold ms":>9}{"p50 ms":>9}{"p95 ms":>9}{"queries":>9}{"http":>6}')
+            for endpoint, row in report.items():
+                self.stdout.write(
+                    f'{endpoint:<24}{row["cold_ms"]:>9.1f}{row["p50_ms"]:>9.1f}{row["p95_ms"]:>9.1f}'
+                    f'{row["max_queries"]:>9}{row["max_http"]:>6}'
+                )
+        if failures:
+            raise CommandError('Performance budget exceeded:\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('✅ All endpoints within budget'))
+
+    def run_endpoints(self, stub, iterations):
+        from players.models import Player
+
+        client = Client()
+        player_id = Player.objects.order_by('id').values_list('id', flat=True).first()
+        endpoints = {
+            "/players/details/": "/players/details/",
+            "/players/details/<id>": f"/players/details/{player_id}",
+            "/leaderboard/points/": "/leaderboard/points/",
+            "/featured/games/": "/featured/games/",
+        }
+        report = {}
+        for name, path in endpoints.items():
+            timings, queries, calls = [], [], []
+            for _ in range(iterations + 1):
+                before = stub.calls
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = client.get(path)
+                    if getattr(response, 'streaming', False):
+                        b''.join(response.streaming_content)
+                    timings.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    raise CommandError(f'{path} returned {response.status_code}')
+                queries.append(len(captured))
+                calls.append(stub.calls - before)
+            cold, warm = timings[0], timings[1:]
+            report[name] = {
+                "cold_ms": round(cold, 1),
+                "p50_ms": round(statistics.median(warm), 1),
+                "p95_ms": round(percentile(warm, 0.95), 1),
+                "max_queries": max(queries[1:]),
+                "max_http": max(calls[1:]),
+                "cold_queries": queries[0],
+                "cold_http": calls[0],
+            }
+        return report
@@ -0,0 +1,78 @@
+import io
+import json
+import random
+import time
+import chess
+import chess.pgn
+from django.core.management.base import BaseCommand, CommandError
+
+from players.pgn import scan_archive
+
+OPENINGS = [
+    "Sicilian-Defense", "French-Defense", "Caro-Kann-Defense", "Ruy-Lopez-Opening",
+    "Italian-Game", "Queens-Gambit-Declined", "Kings-Indian-Defense", "English-Opening",
+]
+
+
+def random_game(rng, index, plies):
+    board = chess.Board()
+    for _ in range(plies):
+        moves = list(board.legal_moves)
+        if not moves:
+            break
+        board.push(rng.choice(moves))
+    game = chess.pgn.Game.from_board(board)
+    game.headers["Event"] = "Live Chess"
+    game.headers["Date"] = "2025.05.01"
+    game.headers["White"] = f"player{index}"
+    game.headers["Black"] = f"opponent{index}"
+    game.headers["Result"] = rng.choice(["1-0", "0-1", "1/2-1/2"])
+    game.headers["ECO"] = f"B{rng.randint(0, 99):02d}"
+    game.headers["ECOUrl"] = f"https://www.chess.com/openings/{rng.choice(OPENINGS)}"
+    return str(game)
+
+
+def full_parse(data):
+    for g in data.get("games", []):
+        game = chess.pgn.read_game(io.StringIO(g.get("pgn", "")))
+        headers = game.headers
+        yield (headers.get("White", ""), headers.get("Black", ""), headers.get("Result", ""),
+               headers.get("ECO", ""), headers.get("ECOUrl", ""), headers.get("Date", ""),
+               headers.get("Event", ""), headers.get("Round", ""),
+               headers.get("Link") or headers.get("Site", ""))
+
+
+class Command(BaseCommand):
+    help = 'Compare chess.pgn.read_game with the header-only scanner on a monthly archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--archive', help='Path to a Chess.com monthly archive JSON file')
+        parser.add_argument('--games', type=int, default=2000, help='Synthetic games when no archive is given')
+        parser.add_argument('--plies', type=int, default=80)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['archive']:
+            with open(options['archive']) as f:
+                data = json.load(f)
+        else:
+            rng = random.Random(options['seed'])
+            data = {"games": [{"pgn": random_game(rng, i, options['plies'])}
+                              for i in range(options['games'])]}
+        total = len(data.get("games", []))
+
+        started = time.perf_counter()
+        expected = list(full_parse(data))
+        full_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        scanned = [tuple(h) for h in scan_archive(data)]
+        scan_time = time.perf_counter() - started
+
+        if scanned != expected:
+            raise CommandError('Header scanner disagrees with chess.pgn.read_game')
+
+        self.stdout.write(f'games:           {total}')
+        self.stdout.write(f'chess.pgn:       {full_time * 1000:.1f} ms')
+        self.stdout.write(f'header scanner:  {scan_time * 1000:.1f} ms')
+        self.stdout.write(self.style.SUCCESS(f'✅ {full_time / max(scan_time, 1e-9):.1f}x faster'))
@@ -1,53 +1,165 @@
-from django.core.management.base import BaseCommand
-from django_seed import Seed
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from faker import Faker
+import math
 import random
+import time
 
 from players.models import Player
-from leaderboard.models import Tournament
+from leaderboard.models import Bye, Tournament
+from leaderboard.pairing import Entrant, pair
+from leaderboard.ratings import update_ratings
+from leaderboard.standings import rebuild_standings
 from featured_games.models import Game, Featured
 
+
+def round_robin(players, rounds):
+    """Circle-method pairings: yields one list of (white, black) pairs per round."""
+    players = list(players)
+    if len(players) % 2:
+        players.append(None)
+    half = len(players) // 2
+    for round_index in range(rounds):
+        pairs = []
+        for i in range(half):
+            a, b = players[i], players[-1 - i]
+            if a is not None and b is not None:
+                pairs.append((a, b) if (round_index + i) % 2 == 0 else (b, a))
+        yield pairs
+        players = [players[0], players[-1]] + players[1:-1]
+
+
+def play(white, black, strength, rng):
+    """Draw a result from the Elo expectation of the two hidden strengths."""
+    expected = 1 / (1 + 10 ** ((strength[black] - strength[white] - 35) / 400))
+    draw = 0.3 * (1 - abs(expected - 0.5) * 2)
+    roll = rng.random()
+    if roll < draw:
+        return '1/2-1/2'
+    return '1-0' if roll < draw + (1 - draw) * expected else '0-1'
+
+
 class Command(BaseCommand):
     help = 'Seed database with Players, Tournaments, Games, and Featured games'
 
-    def handle(self, *args, **kwargs):
-        seeder = Seed.seeder()
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=20)
+        parser.add_argument('--tournaments', type=int, default=10)
+        parser.add_argument('--games', type=int, default=90, help='Total games across all tournaments')
+        parser.add_argument('--rounds', type=int, default=7, help='Rounds per tournament')
+        parser.add_argument('--featured-ratio', type=float, default=0.5)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, help='Random seed for reproducible datasets')
+
+    def handle(self, *args, **options):
+        if options['players'] < 2 or options['tournaments'] < 1 or options['rounds'] < 1:
+            raise CommandError('Need at least 2 players, 1 tournament and 1 round')
+        rng = random.Random(options['seed'])
         fake = Faker()
+        fake.seed_instance(options['seed'])
+        batch_size = options['batch_size']
+        started = time.monotonic()
 
         # Seed Players
-        seeder.add_entity(Player, 20, {
-            'name': lambda x: fake.name(),
-            'chess_id': lambda x: fake.user_name() + str(random.randint(100, 999)),
-            'player_class': lambda x: random.choice(['Beginner', 'Intermediate', 'Advanced']),
-            'bio': lambda x: fake.sentence(nb_words=50)
-        })
-
-        # Seed Tournaments
-        seeder.add_entity(Tournament, 10, {
-            'name': lambda x: fake.catch_phrase(),
-        })
-
-        inserted_pks = seeder.execute()
-        player_ids = list(Player.objects.values_list('id', flat=True))
-        tournament_ids = list(Tournament.objects.values_list('id', flat=True))
+        token = f'{rng.getrandbits(24):06x}'
+        player_ids = []
+        for start in range(0, options['players'], batch_size):
+            batch = [
+                Player(
+                    name=fake.name(),
+                    chess_id=f'{fake.user_name()[:30]}_{token}{i}',
+                    player_class=rng.choice(['Beginner', 'Intermediate', 'Advanced']),
+                    bio=fake.sentence(nb_words=50),
+                )
+                for i in range(start, min(start + batch_size, options['players']))
+            ]
+            with transaction.atomic():
+                player_ids.extend(p.id for p in Player.objects.bulk_create(batch))
+        self.stdout.write(f'{len(player_ids)} players in {time.monotonic() - started:.1f}s')
+
+        # Seed Tournaments; only the newest one is left running.
+        tournaments = Tournament.objects.bulk_create([
+            Tournament(name=fake.catch_phrase(), currently_active=(i == options['tournaments'] - 1))
+            for i in range(options['tournaments'])
+        ])
 
         # Seed Games
-        for _ in range(90):
-            ply1_id, ply2_id = random.sample(player_ids, 2)
-            game = Game.objects.create(
-                ply1_id=ply1_id,
-                ply2_id=ply2_id,
-                tournament_id=random.choice(tournament_ids),
-                round=random.randint(1, 7),
-                result=random.choice(['1-0', '0-1', '1/2-1/2']),
-                link = f'https://www.chess.com/game/live/{random.randint(100000000000,999999999999)}'
-            )
-            # 50% of games become featured
-            if random.random() < 0.5:
-                Featured.objects.create(
-                    game=game,
-                    like=random.randint(0, 100),
-                    dislike=random.randint(0, 20)
-                )
+        strength = {pid: rng.gauss(1500, 300) for pid in player_ids}
+        games_per_tournament = math.ceil(options['games'] / len(tournaments))
+        field_size = min(len(player_ids), max(2, 2 * math.ceil(games_per_tournament / options['rounds'])))
+        pending = []
+        seeded_byes = []
+        created = 0
+        for tournament in tournaments:
+            field = rng.sample(player_ids, field_size)
+            budget = min(games_per_tournament, options['games'] - created - len(pending))
+            if len(field) <= options['rounds'] + 1:
+                schedule = round_robin(field, options['rounds'])
+            else:
+                schedule = None
+                scores = dict.fromkeys(field, 0.0)
+                opponents = {p: set() for p in field}
+                colours = dict.fromkeys(field, '')
+                byes = dict.fromkeys(field, 0)
+
+            for round_id in range(1, options['rounds'] + 1):
+                if budget <= 0:
+                    break
+                if schedule:
+                    pairs = next(schedule, [])
+                else:
+                    boards, bye = pair([
+                        Entrant(p, scores[p], int(strength[p]), frozenset(opponents[p]), colours[p], byes[p])
+                        for p in field
+                    ])
+                    pairs = [(white.id, black.id) for white, black in boards]
+                    if bye is not None:
+                        byes[bye.id] += 1
+                        if len(pairs) <= budget:  # the whole round is stored
+                            seeded_byes.append(Bye(tournament_id=tournament.id, round=round_id, player_id=bye.id))
+                for white, black in pairs[:budget]:
+                    result = play(white, black, strength, rng)
+                    if schedule is None:
+                        white_points = {'1-0': 1.0, '0-1': 0.0}.get(result, 0.5)
+                        scores[white] += white_points
+                        scores[black] += 1 - white_points
+                        opponents[white].add(black)
+                        opponents[black].add(white)
+                        colours[white] += 'W'
+                        colours[black] += 'B'
+                    pending.append(Game(
+                        ply1_id=white,
+                        ply2_id=black,
+                        tournament_id=tournament.id,
+                        round=round_id,
+                        result=result,
+                        link=f'https://www.chess.com/game/live/{rng.randint(100000000000, 999999999999)}',
+                    ))
+                budget -= min(len(pairs), budget)
+                if len(pending) >= batch_size:
+                    created += self.flush(pending, options['featured_ratio'], rng)
+                    pending = []
+        created += self.flush(pending, options['featured_ratio'], rng)
+        Bye.objects.bulk_create(seeded_byes)
+        self.stdout.write(f'{created} games in {time.monotonic() - started:.1f}s')
+
+        # bulk_create skips the signals that keep ratings and standings current.
+        update_ratings()
+        for tournament in tournaments:
+            if tournament.currently_active:
+                rebuild_standings(tournament)
 
         self.stdout.write(self.style.SUCCESS('✅ Database seeded successfully!'))
+
+    def flush(self, games, featured_ratio, rng):
+        if not games:
+            return 0
+        with transaction.atomic():
+            games = Game.objects.bulk_create(games)
+            # Featured.save() runs full_clean(); every seeded game has a link.
+            Featured.objects.bulk_create([
+                Featured(game=game, like=rng.randint(0, 100), dislike=rng.randint(0, 20))
+                for game in games
+                if rng.random() < featured_ratio
+            ])
+        return len(games)
@@ -0,0 +1,62 @@
+from datetime import timedelta
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from leaderboard.models import Tournament
+from leaderboard.standings import rebuild_standings
+from players import chesscom
+from players.models import Player
+from players.openings import update_opening_index
+from players.resilience import breaker_stats
+from players.stats import stale_players, sync_stats
+
+
+class Command(BaseCommand):
+    help = 'Fetch Chess.com ratings and records for stale players and store them in PlayerStats'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age', type=int, default=settings.CHESSCOM_STATS_MAX_AGE,
+                            help='Refresh players whose stats are older than this many seconds')
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--concurrency', type=int, default=settings.CHESSCOM_CONCURRENCY)
+        parser.add_argument('--all', action='store_true', help='Refresh every player regardless of age')
+        parser.add_argument('--openings', action='store_true',
+                            help='Also fold new Chess.com games into the opening index')
+
+    def handle(self, *args, **options):
+        if options['all']:
+            players = Player.objects.order_by('id')
+        else:
+            players = stale_players(timedelta(seconds=options['max_age']))
+
+        started = time.monotonic()
+        batch_size = options['batch_size']
+        ids = list(players.values_list('id', flat=True))
+        synced = 0
+        for start in range(0, len(ids), batch_size):
+            batch = Player.objects.filter(id__in=ids[start:start + batch_size])
+            synced += len(sync_stats(batch, options['concurrency']))
+            if options['openings']:
+                for player in batch:
+                    archives = chesscom.get_json(chesscom.archives_url(player.chess_id))
+                    if archives:
+                        update_opening_index(player, archives.get('archives', []))
+            self.stdout.write(f'{min(start + batch_size, len(ids))}/{len(ids)} players processed')
+
+        # Standings show each player's rating, so refresh live events.
+        if synced:
+            for tournament in Tournament.objects.filter(currently_active=True):
+                rebuild_standings(tournament)
+
+        for breaker in breaker_stats():
+            if breaker['transitions'] or breaker['rejected']:
+                self.stdout.write(self.style.WARNING(
+                    f"Circuit {breaker['name']} is {breaker['state']}: "
+                    f"{breaker['rejected']} requests skipped, transitions {breaker['transitions']}"
+                ))
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Synced {synced} of {len(ids)} stale players in {elapsed:.1f}s'
+        ))
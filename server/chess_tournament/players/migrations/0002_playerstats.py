@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-18 10:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating', models.PositiveIntegerField(default=0)),
+                ('rapid_rating', models.PositiveIntegerField(default=0)),
+                ('rapid_win', models.PositiveIntegerField(default=0)),
+                ('rapid_loss', models.PositiveIntegerField(default=0)),
+                ('rapid_draw', models.PositiveIntegerField(default=0)),
+                ('blitz_win', models.PositiveIntegerField(default=0)),
+                ('blitz_loss', models.PositiveIntegerField(default=0)),
+                ('blitz_draw', models.PositiveIntegerField(default=0)),
+                ('bullet_win', models.PositiveIntegerField(default=0)),
+                ('bullet_loss', models.PositiveIntegerField(default=0)),
+                ('bullet_draw', models.PositiveIntegerField(default=0)),
+                ('fetched_at', models.DateTimeField(db_index=True)),
+                ('player', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='chess_stats', to='players.player')),
+            ],
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-18 11:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0002_playerstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OpeningIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('archive', models.CharField(blank=True, max_length=7)),
+                ('games_seen', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('player', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='opening_index', to='players.player')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OpeningStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('opening', models.CharField(max_length=200)),
+                ('win', models.PositiveIntegerField(default=0)),
+                ('loss', models.PositiveIntegerField(default=0)),
+                ('draw', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='opening_stats', to='players.player')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['player', '-total'], name='opening_player_total_idx')],
+                'constraints': [models.UniqueConstraint(fields=('player', 'opening'), name='unique_player_opening')],
+            },
+        ),
+    ]
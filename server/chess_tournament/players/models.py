@@ -8,3 +8,57 @@ class Player(models.Model):
 
     def __str__(self):
         return f"{self.name} ({self.chess_id})"
+
+
+class PlayerStats(models.Model):
+    player = models.OneToOneField(Player, related_name='chess_stats', on_delete=models.CASCADE)
+    rating = models.PositiveIntegerField(default=0)  # best available Chess.com rating
+    rapid_rating = models.PositiveIntegerField(default=0)
+    rapid_win = models.PositiveIntegerField(default=0)
+    rapid_loss = models.PositiveIntegerField(default=0)
+    rapid_draw = models.PositiveIntegerField(default=0)
+    blitz_win = models.PositiveIntegerField(default=0)
+    blitz_loss = models.PositiveIntegerField(default=0)
+    blitz_draw = models.PositiveIntegerField(default=0)
+    bullet_win = models.PositiveIntegerField(default=0)
+    bullet_loss = models.PositiveIntegerField(default=0)
+    bullet_draw = models.PositiveIntegerField(default=0)
+    fetched_at = models.DateTimeField(db_index=True)
+
+    def record(self, kind):
+        return {
+            "win": getattr(self, f"{kind}_win"),
+            "loss": getattr(self, f"{kind}_loss"),
+            "draw": getattr(self, f"{kind}_draw"),
+        }
+
+    def __str__(self):
+        return f"Stats for {self.player} ({self.rating})"
+
+
+class OpeningStat(models.Model):
+    player = models.ForeignKey(Player, related_name='opening_stats', on_delete=models.CASCADE)
+    opening = models.CharField(max_length=200)
+    win = models.PositiveIntegerField(default=0)
+    loss = models.PositiveIntegerField(default=0)
+    draw = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['player', 'opening'], name='unique_player_opening'),
+        ]
+        indexes = [models.Index(fields=['player', '-total'], name='opening_player_total_idx')]
+
+    def __str__(self):
+        return f"{self.player.name}: {self.opening} ({self.total})"
+
+
+class OpeningIndex(models.Model):
+    player = models.OneToOneField(Player, related_name='opening_index', on_delete=models.CASCADE)
+    archive = models.CharField(max_length=7, blank=True)  # last processed month, "YYYY/MM"
+    games_seen = models.PositiveIntegerField(default=0)  # games already counted in that month
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Openings for {self.player} up to {self.archive or 'nothing'}"
@@ -0,0 +1,144 @@
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.db import transaction
+from . import chesscom, chesscom_async
+from .models import OpeningIndex, OpeningStat
+from .pgn import read_headers
+
+# How many recent games a player's first index build covers. Whole months are
+# read, so the first build may count slightly more.
+INITIAL_GAMES = 250
+
+
+def archive_month(url):
+    month = chesscom.MONTH_ARCHIVE_RE.search(url)
+    return f"{month.group(1)}/{month.group(2)}" if month else None
+
+
+def following_month(month):
+    year, number = map(int, month.split("/"))
+    return f"{year + number // 12}/{number % 12 + 1:02d}"
+
+
+def game_outcome(player_id, pgn):
+    """Return (opening, "win"/"loss"/"draw"/None) for one game, or None if it has no opening."""
+    headers = read_headers(pgn)
+    opening = headers.eco_url.split("/")[-1].replace("-", " ").strip()
+    if not opening:
+        return None
+    player_color = "White" if headers.white.lower() == player_id.lower() else "Black"
+    if headers.result == "1-0":
+        return opening, "win" if player_color == "White" else "loss"
+    if headers.result == "0-1":
+        return opening, "win" if player_color == "Black" else "loss"
+    if headers.result == "1/2-1/2":
+        return opening, "draw"
+    return opening, None
+
+
+def tally(player_id, games, deltas):
+    for g in games:
+        outcome = game_outcome(player_id, g.get("pgn", ""))
+        if outcome is None:
+            continue
+        opening, result = outcome
+        if result:
+            deltas[opening][result] += 1
+        deltas[opening]["total"] += 1
+
+
+def remaining(deadline):
+    return None if deadline is None else max(deadline - time.monotonic(), 0)
+
+
+def fetch_months(urls, deadline=None):
+    """Fetch monthly archives concurrently, oldest first, stopping at the first failure."""
+    fetched = []
+    for url, data in zip(urls, chesscom_async.get_many(urls, timeout=remaining(deadline))):
+        if data is None:
+            break
+        fetched.append((url, data.get("games", [])))
+    return fetched
+
+
+def backfill_months(urls, deadline=None):
+    """Fetch the newest whole months that together hold at least INITIAL_GAMES games."""
+    newest_first = list(reversed(urls))
+    window = settings.CHESSCOM_CONCURRENCY
+    fetched = []
+    count = 0
+    for start in range(0, len(newest_first), window):
+        batch = newest_first[start:start + window]
+        for url, data in zip(batch, chesscom_async.get_many(batch, timeout=remaining(deadline))):
+            if count >= INITIAL_GAMES:
+                break
+            if data is None:
+                # A gap would leave an unindexed month behind the cursor.
+                return list(reversed(fetched))
+            games = data.get("games", [])
+            fetched.append((url, games))
+            count += len(games)
+        if count >= INITIAL_GAMES:
+            break
+    return list(reversed(fetched))
+
+
+def apply_deltas(player, deltas):
+    existing = {
+        stat.opening: stat
+        for stat in OpeningStat.objects.filter(player=player, opening__in=list(deltas))
+    }
+    created = []
+    for opening, delta in deltas.items():
+        stat = existing.get(opening)
+        if stat is None:
+            created.append(OpeningStat(player=player, opening=opening, **delta))
+            continue
+        for field, value in delta.items():
+            setattr(stat, field, getattr(stat, field) + value)
+    OpeningStat.objects.bulk_create(created)
+    OpeningStat.objects.bulk_update(existing.values(), ["win", "loss", "draw", "total"])
+
+
+def update_opening_index(player, urls, timeout=None):
+    """Fold games played since the last update into the player's opening stats.
+
+    Months before the stored cursor are never fetched again; in the cursor
+    month only games beyond ``games_seen`` are parsed. With ``timeout``,
+    months not fetched within that many seconds wait for a later update.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    index, _ = OpeningIndex.objects.get_or_create(player=player)
+    months = [url for url in urls if archive_month(url)]
+    if index.archive:
+        fetched = fetch_months([url for url in months if archive_month(url) >= index.archive], deadline)
+    else:
+        fetched = backfill_months(months, deadline)
+    if not fetched:
+        return
+
+    deltas = defaultdict(lambda: {"win": 0, "loss": 0, "draw": 0, "total": 0})
+    for url, games in fetched:
+        if archive_month(url) == index.archive:
+            games = games[index.games_seen:]
+        tally(player.chess_id, games, deltas)
+    last_url, last_games = fetched[-1]
+
+    with transaction.atomic():
+        locked = OpeningIndex.objects.select_for_update().get(pk=index.pk)
+        if (locked.archive, locked.games_seen) != (index.archive, index.games_seen):
+            return  # another request already folded these games in
+        apply_deltas(player, deltas)
+        if chesscom.is_closed_month(last_url):
+            # A closed month gains no games, so the next update starts after it.
+            locked.archive, locked.games_seen = following_month(archive_month(last_url)), 0
+        else:
+            locked.archive, locked.games_seen = archive_month(last_url), len(last_games)
+        locked.save()
+    # Closed months are never fetched again once counted.
+    chesscom.forget(url for url, _ in fetched if chesscom.is_closed_month(url))
+
+
+def favorite_openings(player, limit=5):
+    return player.opening_stats.order_by("-total", "opening")[:limit]
@@ -0,0 +1,78 @@
+import re
+from typing import NamedTuple
+
+TAG_RE = re.compile(r'\[\s*([A-Za-z0-9_]+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+ESCAPE_RE = re.compile(r'\\(.)')
+
+
+class GameHeaders(NamedTuple):
+    white: str
+    black: str
+    result: str
+    eco: str
+    eco_url: str
+    date: str
+    event: str
+    round: str
+    link: str
+
+
+def headers_from_tags(tags):
+    return GameHeaders(
+        white=tags.get("White", ""),
+        black=tags.get("Black", ""),
+        result=tags.get("Result", ""),
+        eco=tags.get("ECO", ""),
+        eco_url=tags.get("ECOUrl", ""),
+        date=tags.get("Date", ""),
+        event=tags.get("Event", ""),
+        round=tags.get("Round", ""),
+        link=tags.get("Link") or tags.get("Site", ""),
+    )
+
+
+def parse_tag(match):
+    value = match.group(2)
+    if "\\" in value:
+        value = ESCAPE_RE.sub(r"\1", value)
+    return match.group(1), value
+
+
+def read_headers(pgn):
+    """Read the tag pairs of a single PGN game without parsing its moves."""
+    head = pgn.lstrip().split("\n\n", 1)[0]
+    return headers_from_tags(dict(parse_tag(m) for m in TAG_RE.finditer(head)))
+
+
+def scan_archive(data):
+    """Yield GameHeaders for every game in a Chess.com monthly archive."""
+    for game in data.get("games", []):
+        pgn = game.get("pgn")
+        if pgn:
+            yield read_headers(pgn)
+
+
+def iter_headers(lines):
+    """Yield GameHeaders for each game in a PGN stream, skipping all movetext.
+
+    ``lines`` can be an open text file, so multi-gigabyte files are read one
+    line at a time.
+    """
+    tags = {}
+    in_movetext = False
+    for line in lines:
+        line = line.strip()
+        if line.startswith("["):
+            match = TAG_RE.match(line)
+            if match is None:
+                continue
+            name, value = parse_tag(match)
+            if in_movetext or name in tags:
+                yield headers_from_tags(tags)
+                tags = {}
+                in_movetext = False
+            tags[name] = value
+        elif line and tags:
+            in_movetext = True
+    if tags:
+        yield headers_from_tags(tags)
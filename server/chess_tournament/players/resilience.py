@@ -0,0 +1,158 @@
+"""
+Timeouts, retries and circuit breaking for calls to Chess.com.
+
+Both the synchronous ``chesscom.get_json`` and the asyncio ``ChessComClient``
+go through one ``CircuitBreaker`` per host. After CHESSCOM_BREAKER_THRESHOLD
+consecutive failures the breaker opens and callers stop contacting the host,
+serving whatever is cached instead. Once CHESSCOM_BREAKER_RESET seconds have
+passed a single trial request is let through (half-open); it closes the
+breaker on success and reopens it on failure.
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+DEFAULT_RETRY_AFTER = 5.0
+
+
+def timeouts():
+    return settings.CHESSCOM_CONNECT_TIMEOUT, settings.CHESSCOM_READ_TIMEOUT
+
+
+def retry_after(response):
+    try:
+        return max(float(response.headers.get("Retry-After", "")), 0.0)
+    except ValueError:
+        return DEFAULT_RETRY_AFTER
+
+
+def backoff(attempt, response=None):
+    """Seconds to wait before retry number ``attempt`` (counting from 0).
+
+    A Retry-After header is honoured as given; otherwise the delay is drawn
+    with full jitter from an exponentially growing window.
+    """
+    if response is not None and "Retry-After" in response.headers:
+        return retry_after(response)
+    window = min(settings.CHESSCOM_BACKOFF_MAX, settings.CHESSCOM_BACKOFF_BASE * 2 ** attempt)
+    return random.uniform(0, window)
+
+
+def should_retry(response):
+    return response.status_code in RETRYABLE_STATUSES
+
+
+class CircuitBreaker:
+    def __init__(self, name, threshold=None, reset_timeout=None):
+        self.name = name
+        self.threshold = threshold or settings.CHESSCOM_BREAKER_THRESHOLD
+        self.reset_timeout = settings.CHESSCOM_BREAKER_RESET if reset_timeout is None else reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started = None
+        self.transitions = Counter()
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def _move(self, state):
+        self.transitions[f"{self.state}->{state}"] += 1
+        level = logging.WARNING if state == OPEN else logging.INFO
+        logger.log(level, "circuit %s: %s -> %s after %d failures", self.name, self.state, state, self.failures)
+        self.state = state
+
+    def allow(self):
+        """Whether a request may be sent now."""
+        with self.lock:
+            now = time.monotonic()
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and now - self.opened_at >= self.reset_timeout:
+                self._move(HALF_OPEN)
+                self.probe_started = now
+                return True
+            # A trial request that never reported back must not wedge the breaker.
+            if self.state == HALF_OPEN and now - self.probe_started >= self.reset_timeout:
+                self.probe_started = now
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self.lock:
+            if self.state != CLOSED:
+                self._move(CLOSED)
+            self.failures = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.threshold):
+                self.opened_at = time.monotonic()
+                self._move(OPEN)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "name": self.name,
+                "state": self.state,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "transitions": dict(self.transitions),
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(url):
+    host = urlsplit(url).netloc
+    with _breakers_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker(host)
+        return _breakers[host]
+
+
+def breaker_stats():
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return [breaker.snapshot() for breaker in breakers]
+
+
+def call(url, send, errors):
+    """Call ``send()`` with retries, returning its response or None.
+
+    ``errors`` are the exception types that count as a failed attempt. Waits
+    longer than CHESSCOM_BACKOFF_MAX are not slept through: the request
+    gives up instead so the calling thread is released.
+    """
+    breaker = breaker_for(url)
+    for attempt in range(settings.CHESSCOM_MAX_RETRIES + 1):
+        if attempt and not breaker.allow():
+            return None
+        try:
+            response = send()
+        except errors:
+            response = None
+        if response is not None and not should_retry(response):
+            breaker.record_success()
+            return response
+        breaker.record_failure()
+        delay = backoff(attempt, response)
+        if attempt == settings.CHESSCOM_MAX_RETRIES or delay > settings.CHESSCOM_BACKOFF_MAX:
+            break
+        time.sleep(delay)
+    return None
@@ -0,0 +1,134 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+from . import chesscom, chesscom_async
+from .models import Player, PlayerStats
+
+# Refreshes triggered by requests run here so responses never wait on Chess.com.
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="stats-refresh")
+REFRESH_CLAIM_TIMEOUT = 300
+
+STATS_FIELDS = [
+    "rating", "rapid_rating",
+    "rapid_win", "rapid_loss", "rapid_draw",
+    "blitz_win", "blitz_loss", "blitz_draw",
+    "bullet_win", "bullet_loss", "bullet_draw",
+    "fetched_at",
+]
+
+
+def stats_from_json(data):
+    rapid = data.get("chess_rapid", {})
+    blitz = data.get("chess_blitz", {})
+    bullet = data.get("chess_bullet", {})
+
+    # Prefer rapid rating, but fall back to other available Chess.com ratings
+    # so players without rapid history do not incorrectly appear as 0.
+    rating_candidates = [
+        rapid.get("last", {}).get("rating", 0),
+        bullet.get("last", {}).get("rating", 0),
+        blitz.get("last", {}).get("rating", 0),
+    ]
+    values = {
+        "rating": next((value for value in rating_candidates if value), 0),
+        "rapid_rating": rapid.get("last", {}).get("rating", 0),
+    }
+    for kind, section in (("rapid", rapid), ("blitz", blitz), ("bullet", bullet)):
+        record = section.get("record", {})
+        for outcome in ("win", "loss", "draw"):
+            values[f"{kind}_{outcome}"] = record.get(outcome, 0)
+    return values
+
+
+def stale_players(max_age):
+    cutoff = timezone.now() - max_age
+    return Player.objects.filter(
+        Q(chess_stats__isnull=True) | Q(chess_stats__fetched_at__lt=cutoff)
+    ).order_by("id")
+
+
+def sync_stats(players, concurrency=None):
+    """Fetch Chess.com stats for ``players`` concurrently and upsert PlayerStats.
+
+    Players whose fetch fails are left untouched so the next run retries them.
+    Returns the saved PlayerStats rows.
+    """
+    players = list(players)
+    results = chesscom_async.get_many(
+        (chesscom.stats_url(p.chess_id) for p in players), concurrency
+    )
+    now = timezone.now()
+    rows = [
+        PlayerStats(player=player, fetched_at=now, **stats_from_json(data))
+        for player, data in zip(players, results)
+        if data is not None
+    ]
+    PlayerStats.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["player"],
+        update_fields=STATS_FIELDS,
+    )
+    return rows
+
+
+def refresh_in_background(player_ids, on_done=None):
+    """Queue a stats refresh for players nobody else is already refreshing.
+
+    Returns a Future, or None when every player already has a refresh in
+    flight. ``on_done`` runs in the worker after the new stats are saved.
+    """
+    cache = caches["default"]
+    claimed = [pid for pid in player_ids if cache.add(f"stats:refreshing:{pid}", 1, REFRESH_CLAIM_TIMEOUT)]
+    if not claimed:
+        return None
+
+    def refresh():
+        try:
+            rows = sync_stats(Player.objects.filter(id__in=claimed))
+            if rows and on_done is not None:
+                on_done()
+            return rows
+        finally:
+            cache.delete_many([f"stats:refreshing:{pid}" for pid in claimed])
+            connections.close_all()
+
+    return _executor.submit(refresh)
+
+
+def is_stale(stats, now=None):
+    max_age = timedelta(seconds=settings.CHESSCOM_STATS_MAX_AGE)
+    return stats.fetched_at < (now or timezone.now()) - max_age
+
+
+def ensure_stats(players, deadline=None):
+    """Attach stats to players, serving what is stored and refreshing stale rows behind the scenes.
+
+    Players that have never been synced are fetched in the background too,
+    but the caller waits up to ``deadline`` seconds for them; any still
+    missing afterwards are shown without stats. ``players`` should come from
+    a queryset using select_related("chess_stats").
+    """
+    players = list(players)
+    now = timezone.now()
+    missing = [p for p in players if not hasattr(p, "chess_stats")]
+    stale = [p.id for p in players if hasattr(p, "chess_stats") and is_stale(p.chess_stats, now)]
+    # Queue the missing players first so they never wait behind a big stale batch.
+    future = refresh_in_background([p.id for p in missing]) if missing else None
+    if stale:
+        refresh_in_background(stale)
+    if future is not None:
+        try:
+            future.result(timeout=settings.CHESSCOM_REQUEST_DEADLINE if deadline is None else deadline)
+        except FutureTimeout:
+            pass
+    if missing:
+        found = PlayerStats.objects.in_bulk([p.id for p in missing], field_name="player_id")
+        for player in missing:
+            if player.id in found:
+                player.chess_stats = found[player.id]
+    return players
@@ -1,3 +1,668 @@
-from django.test import TestCase
+import asyncio
+import base64
+import json
+import os
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+import httpx
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
-# Create your tests here.
+from featured_games.models import Game
+from leaderboard.models import Tournament
+from chess_tournament import instrumentation
+from .benchmarks.stub import StubChessCom
+from .models import OpeningIndex, OpeningStat, Player, PlayerStats
+from . import chesscom, chesscom_async, openings, pgn, resilience, stats
+
+
+def make_roster(count, offset=0):
+    """``count`` players with fresh stats, games in two tournaments and a few titles."""
+    players = Player.objects.bulk_create(
+        Player(name=f'Player {i}', chess_id=f'player{i}', player_class='Beginner')
+        for i in range(offset, offset + count)
+    )
+    now = timezone.now()
+    PlayerStats.objects.bulk_create(
+        PlayerStats(player=player, rating=1000 + i, rapid_rating=1000 + i, rapid_win=i % 7, fetched_at=now)
+        for i, player in enumerate(players)
+    )
+    tournaments = [Tournament.objects.create(name=f'Open {offset} {n}', currently_active=False) for n in range(2)]
+    Game.objects.bulk_create(
+        Game(ply1=white, ply2=black, tournament=tournaments[i % 2], round=1, result='1-0')
+        for i, (white, black) in enumerate(zip(players[::2], players[1::2]))
+    )
+    tournaments[0].winner1.add(players[0])
+    tournaments[1].winner2.add(players[1])
+    return players
+
+
+@override_settings(RATING_SOURCE='chesscom')
+class RosterQueryTests(TestCase):
+    # The players, three achievement prefetches and two tournament lookups.
+    ROSTER_QUERIES = 6
+
+    def test_roster_query_count_does_not_grow_with_players(self):
+        total = 0
+        for size in (20, 200, 2000):
+            make_roster(size - total, offset=total)
+            total = size
+            with self.subTest(players=size), self.assertNumQueries(self.ROSTER_QUERIES):
+                response = self.client.get('/players/details/')
+            self.assertEqual(len(response.json()), size)
+
+    def test_selected_fields_skip_unneeded_queries(self):
+        make_roster(50)
+        with self.assertNumQueries(1):
+            response = self.client.get('/players/details/', {'fields': 'id,name,rating'})
+        self.assertEqual(set(response.json()[0]), {'id', 'name', 'rating'})
+
+
+@override_settings(RATING_SOURCE='chesscom')
+class RosterStreamTests(TestCase):
+    # Per chunk: three achievement prefetches and two tournament lookups.
+    CHUNK_QUERIES = 5
+
+    def setUp(self):
+        make_roster(450)
+
+    def read(self, response, stream):
+        body = b''.join(response.streaming_content).decode()
+        return [json.loads(line) for line in body.splitlines()] if stream == 'ndjson' else json.loads(body)
+
+    def test_streams_match_the_buffered_roster(self):
+        buffered = self.client.get('/players/details/').json()
+        for stream in ('ndjson', 'json'):
+            with self.subTest(stream=stream):
+                self.assertEqual(self.read(self.client.get('/players/details/', {'stream': stream}), stream), buffered)
+
+    @patch('players.views.STREAM_CHUNK_SIZE', 100)
+    def test_queries_are_fixed_per_chunk(self):
+        # One query streams the players; each chunk of 100 adds a fixed number.
+        with self.assertNumQueries(1 + 5 * self.CHUNK_QUERIES):
+            entries = self.read(self.client.get('/players/details/', {'stream': 'ndjson'}), 'ndjson')
+        self.assertEqual(len(entries), 450)
+
+    @patch('players.views.STREAM_CHUNK_SIZE', 100)
+    def test_first_entries_are_sent_before_later_chunks_load(self):
+        response = self.client.get('/players/details/', {'stream': 'ndjson'})
+        with CaptureQueriesContext(connection) as queries:
+            first = next(iter(response.streaming_content))
+        self.assertEqual(json.loads(first)['id'], Player.objects.order_by('id').first().id)
+        self.assertEqual(len(queries), 1 + self.CHUNK_QUERIES)
+        response.close()
+
+    @patch('players.views.STREAM_CHUNK_SIZE', 100)
+    @override_settings(CHESSCOM_REQUEST_DEADLINE=1.0)
+    def test_chunks_share_one_stats_deadline(self):
+        with patch('players.views.ensure_stats', side_effect=stats.ensure_stats) as ensure:
+            self.read(self.client.get('/players/details/', {'stream': 'json'}), 'json')
+        deadlines = [call.kwargs['deadline'] for call in ensure.call_args_list]
+        self.assertEqual(len(deadlines), 5)
+        self.assertLessEqual(deadlines[0], 1.0)
+        self.assertEqual(deadlines, sorted(deadlines, reverse=True))
+
+
+@override_settings(RATING_SOURCE='chesscom')
+class RosterPagingTests(TestCase):
+    def setUp(self):
+        players = make_roster(23)
+        # Ties on every sort key, so the id tiebreak is exercised.
+        PlayerStats.objects.filter(player__in=players[::3]).update(rating=1500)
+        Player.objects.filter(id__in=[p.id for p in players[::4]]).update(name='Same Name')
+        Player.objects.filter(id__in=[p.id for p in players[::2]]).update(player_class='Advanced')
+
+    def ids(self, **params):
+        return [player['id'] for player in self.client.get('/players/details/', {'fields': 'id', **params}).json()['players']]
+
+    def test_cursor_pages_match_offset_pages(self):
+        for sort in ('id', '-id', 'rating', '-rating', 'name', '-name', 'player_class', '-player_class'):
+            with self.subTest(sort=sort):
+                by_offset = [pid for offset in range(0, 23, 5) for pid in self.ids(sort=sort, limit=5, offset=offset)]
+                by_cursor, cursor = [], ''
+                while True:
+                    data = self.client.get('/players/details/', {'fields': 'id', 'sort': sort, 'limit': 5,
+                                                                 'cursor': cursor}).json()
+                    by_cursor += [player['id'] for player in data['players']]
+                    cursor = data['next_cursor']
+                    if cursor is None:
+                        break
+                self.assertEqual(by_cursor, by_offset)
+                self.assertEqual(len(set(by_cursor)), 23)
+
+    def test_cursor_from_another_sort_is_rejected(self):
+        cursor = self.client.get('/players/details/', {'sort': 'name', 'limit': 5}).json()['next_cursor']
+        response = self.client.get('/players/details/', {'sort': '-rating', 'limit': 5, 'cursor': cursor})
+        self.assertEqual(response.status_code, 400)
+
+    def test_crafted_cursors_are_rejected(self):
+        def encode(value):
+            return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+        crafted = {
+            'name': [encode(['name', [1, 2], 3]), encode(['name', None, 3]), encode(['name', 'a', '3']),
+                     encode(['name', 'a']), encode({'name': 'a'}), 'not base64!', encode('x')],
+            'rating': [encode(['rating', '1500', 3]), encode(['rating', True, 3]), encode(['rating', 1500, 3.5])],
+            'id': [encode(['id', 1.5, 3]), encode(['id', {}, 3])],
+        }
+        for sort, cursors in crafted.items():
+            for cursor in cursors:
+                with self.subTest(sort=sort, cursor=cursor):
+                    response = self.client.get('/players/details/', {'sort': sort, 'limit': 5, 'cursor': cursor})
+                    self.assertEqual(response.status_code, 400)
+                    self.assertEqual(response.json(), {'error': 'Invalid cursor'})
+
+
+class ChessComClientTests(SimpleTestCase):
+    def setUp(self):
+        caches['chesscom'].clear()
+        caches['chesscom_archives'].clear()
+        resilience._breakers.clear()
+        chesscom_async._limiter = None
+        self.addCleanup(setattr, chesscom_async, '_limiter', None)
+        self.stub = StubChessCom()
+        self.addCleanup(self.stub.close)
+        self.requests = []
+        handle = self.stub.handle
+
+        def recording(request):
+            self.requests.append((time.monotonic(), str(request.url)))
+            return handle(request)
+
+        self.stub.handle = recording
+
+    def urls(self, *names):
+        return [chesscom.stats_url(name) for name in names]
+
+    def test_calls_share_one_client(self):
+        with self.stub.installed():
+            opened = []
+            factory = chesscom_async.httpx.AsyncClient
+
+            def counting(**kwargs):
+                opened.append(kwargs)
+                return factory(**kwargs)
+
+            with patch.object(chesscom_async.httpx, 'AsyncClient', counting):
+                first = chesscom_async.get_many(self.urls('alice'))
+                second = chesscom_async.get_many(self.urls('bob', 'carol'))
+                again = chesscom_async.get_many(self.urls('dave'))
+        self.assertEqual(len(opened), 1)
+        self.assertEqual(self.stub.calls, 4)
+        self.assertTrue(first[0] and second[1] and again[0])
+
+    @override_settings(CHESSCOM_RATE_LIMIT=20)
+    def test_rate_limit_spans_calls(self):
+        with self.stub.installed():
+            for name in ('alice', 'bob', 'carol'):
+                chesscom_async.get_many(self.urls(name))
+        times = [t for t, _ in self.requests]
+        self.assertGreaterEqual(min(b - a for a, b in zip(times, times[1:])), 0.045)
+
+    def test_too_many_requests_pauses_the_host_for_later_calls(self):
+        def handle(request):
+            self.requests.append((time.monotonic(), str(request.url)))
+            if len(self.requests) == 1:
+                return httpx.Response(429, headers={'Retry-After': '0.2'})
+            return httpx.Response(200, json={'chess_rapid': {}})
+
+        self.stub.handle = handle
+        with self.stub.installed():
+            chesscom_async.get_many(self.urls('alice'))
+            chesscom_async.get_many(self.urls('bob'))
+        times = [t for t, _ in self.requests]
+        self.assertEqual(len(times), 3)
+        self.assertGreaterEqual(times[2] - times[0], 0.19)
+
+    @override_settings(CHESSCOM_BACKOFF_MAX=1)
+    def test_retry_after_beyond_the_backoff_cap_gives_up(self):
+        def handle(request):
+            self.requests.append((time.monotonic(), str(request.url)))
+            if len(self.requests) == 1:
+                return httpx.Response(429, headers={'Retry-After': '3600'})
+            return httpx.Response(200, json={'chess_rapid': {}})
+
+        self.stub.handle = handle
+        started = time.monotonic()
+        with self.stub.installed():
+            self.assertEqual(chesscom_async.get_many(self.urls('alice')), [None])
+            self.assertEqual(chesscom_async.get_many(self.urls('bob')), [{'chess_rapid': {}}])
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(len(self.requests), 2)
+
+    def test_timeout_returns_what_has_arrived_and_keeps_fetching(self):
+        async def handle(request):
+            self.requests.append((time.monotonic(), str(request.url)))
+            if 'slow' in str(request.url):
+                await asyncio.sleep(0.3)
+            return httpx.Response(200, json={'url': str(request.url)})
+
+        self.stub.handle = handle
+        with self.stub.installed(), override_settings(CHESSCOM_RATE_LIMIT=0):
+            chesscom_async._limiter = None
+            started = time.monotonic()
+            fast, slow = chesscom_async.get_many(self.urls('fast', 'slow'), timeout=0.1)
+            self.assertLess(time.monotonic() - started, 0.25)
+            self.assertIsNone(slow)
+            self.assertEqual(fast, {'url': self.urls('fast')[0]})
+            time.sleep(0.4)
+            # The slow request finished in the background and was cached.
+            self.assertEqual(chesscom_async.get_many(self.urls('slow'), timeout=0.1)[0], {'url': self.urls('slow')[0]})
+        self.assertEqual(len(self.requests), 2)
+
+    def test_concurrency_limits_one_call(self):
+        in_flight = []
+        peak = []
+
+        async def handle(request):
+            in_flight.append(request)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.pop()
+            return httpx.Response(200, json={})
+
+        self.stub.handle = handle
+        with self.stub.installed(), override_settings(CHESSCOM_RATE_LIMIT=0):
+            chesscom_async._limiter = None
+            results = chesscom_async.get_many(self.urls(*'abcdefgh'), concurrency=2)
+        self.assertEqual(results, [{}] * 8)
+        self.assertEqual(max(peak), 2)
+
+    def test_calls_are_timed_for_the_calling_request(self):
+        recorder = instrumentation.Recorder()
+        token = instrumentation._recorder.set(recorder)
+        try:
+            with self.stub.installed():
+                chesscom_async.get_many(self.urls('alice', 'bob'))
+        finally:
+            instrumentation._recorder.reset(token)
+        self.assertEqual(recorder.metrics['chesscom'][1], 2)
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def test_opens_after_consecutive_failures(self):
+        breaker = resilience.CircuitBreaker('host', threshold=3, reset_timeout=60)
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        for _ in range(2):
+            breaker.record_failure()
+        self.assertEqual(breaker.state, resilience.CLOSED)
+        with self.assertLogs('players.resilience', 'WARNING'):
+            breaker.record_failure()
+        self.assertEqual(breaker.state, resilience.OPEN)
+        self.assertFalse(breaker.allow())
+        self.assertFalse(breaker.allow())
+        snapshot = breaker.snapshot()
+        self.assertEqual((snapshot['rejected'], snapshot['transitions']), (2, {'closed->open': 1}))
+
+    def test_half_open_probe_closes_on_success(self):
+        breaker = resilience.CircuitBreaker('host', threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, resilience.HALF_OPEN)
+        breaker.record_success()
+        self.assertEqual(breaker.state, resilience.CLOSED)
+        self.assertEqual(breaker.snapshot()['transitions'],
+                         {'closed->open': 1, 'open->half_open': 1, 'half_open->closed': 1})
+
+    def test_failed_probe_reopens(self):
+        breaker = resilience.CircuitBreaker('host', threshold=5, reset_timeout=0)
+        for _ in range(5):
+            breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()  # one failure is enough while half-open
+        self.assertEqual(breaker.state, resilience.OPEN)
+        self.assertEqual(breaker.snapshot()['transitions']['half_open->open'], 1)
+
+    def test_only_one_probe_while_half_open(self):
+        breaker = resilience.CircuitBreaker('host', threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        breaker.reset_timeout = 60
+        breaker.opened_at -= 60
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+
+
+@override_settings(CHESSCOM_MAX_RETRIES=3, CHESSCOM_BACKOFF_BASE=0.5, CHESSCOM_BACKOFF_MAX=8,
+                   CHESSCOM_BREAKER_THRESHOLD=10)
+class ResilientCallTests(SimpleTestCase):
+    url = 'https://api.example/pub/player/alice/stats'
+
+    def setUp(self):
+        resilience._breakers.clear()
+        self.sleeps = []
+        clock = SimpleNamespace(monotonic=time.monotonic, sleep=self.sleeps.append)
+        patcher = patch.object(resilience, 'time', clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def call(self, *responses):
+        responses = list(responses)
+
+        def send():
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        result = resilience.call(self.url, send, (httpx.TransportError,))
+        return result, len(responses)
+
+    def test_retries_server_errors_with_capped_jittered_backoff(self):
+        result, left = self.call(httpx.Response(503), httpx.ConnectError('down'), httpx.Response(502),
+                                 httpx.Response(200))
+        self.assertEqual((result.status_code, left), (200, 0))
+        self.assertEqual(len(self.sleeps), 3)
+        for attempt, delay in enumerate(self.sleeps):
+            self.assertLessEqual(delay, 0.5 * 2 ** attempt)
+        self.assertEqual(resilience.breaker_for(self.url).failures, 0)
+
+    def test_gives_up_after_the_last_retry(self):
+        result, left = self.call(*[httpx.Response(500)] * 5)
+        self.assertIsNone(result)
+        self.assertEqual(left, 1)
+        self.assertEqual(resilience.breaker_for(self.url).failures, 4)
+
+    def test_honours_retry_after(self):
+        result, _ = self.call(httpx.Response(429, headers={'Retry-After': '2'}), httpx.Response(200))
+        self.assertEqual(result.status_code, 200)
+        self.assertEqual(self.sleeps, [2.0])
+
+    def test_retry_after_beyond_the_cap_gives_up_without_sleeping(self):
+        result, left = self.call(httpx.Response(429, headers={'Retry-After': '3600'}), httpx.Response(200))
+        self.assertIsNone(result)
+        self.assertEqual((self.sleeps, left), ([], 1))
+
+    def test_client_errors_are_not_retried(self):
+        result, left = self.call(httpx.Response(404), httpx.Response(200))
+        self.assertEqual((result.status_code, left), (404, 1))
+
+    @override_settings(CHESSCOM_BREAKER_THRESHOLD=2, CHESSCOM_BREAKER_RESET=60)
+    def test_open_breaker_stops_retries(self):
+        result, left = self.call(*[httpx.Response(503)] * 4)
+        self.assertIsNone(result)
+        self.assertEqual(left, 2)
+        self.assertEqual(resilience.breaker_for(self.url).state, resilience.OPEN)
+
+
+class ChessComStatusTests(SimpleTestCase):
+    def test_reports_this_workers_breakers(self):
+        resilience._breakers.clear()
+        self.addCleanup(resilience._breakers.clear)
+        breaker = resilience.breaker_for('https://api.chess.com/pub/player/alice/stats')
+        breaker.threshold = 1
+        breaker.record_failure()
+        data = self.client.get('/players/chesscom/status/').json()
+        self.assertEqual(data['pid'], os.getpid())
+        self.assertEqual(data['breakers'], [{
+            'name': 'api.chess.com', 'state': 'open', 'failures': 1, 'rejected': 0,
+            'transitions': {'closed->open': 1},
+        }])
+
+
+class RevalidationTests(SimpleTestCase):
+    url = chesscom.stats_url('alice')
+
+    def setUp(self):
+        caches['chesscom'].clear()
+        resilience._breakers.clear()
+        self.stub = StubChessCom()
+        self.addCleanup(self.stub.close)
+        self.seen_headers = []
+
+    def serve(self, *responses):
+        responses = list(responses)
+
+        def handle(request):
+            self.seen_headers.append(request.headers)
+            return responses.pop(0)
+
+        self.stub.handle = handle
+
+    def store_stale(self):
+        entry = {'data': {'rating': 1200}, 'etag': '"v1"', 'last_modified': 'Mon, 01 Sep 2025 00:00:00 GMT',
+                 'fresh_until': time.time() - 1}
+        caches['chesscom'].set(chesscom.cache_key(self.url), entry, None)
+
+    def cached(self):
+        return caches['chesscom'].get(chesscom.cache_key(self.url))
+
+    def test_stale_entry_is_revalidated_and_304_keeps_the_body(self):
+        for fetch in (chesscom.get_json, lambda url: chesscom_async.get_many([url])[0]):
+            with self.subTest(fetch=fetch):
+                self.store_stale()
+                self.serve(httpx.Response(304))
+                with self.stub.installed(), patch.object(chesscom, 'make_entry') as decoded:
+                    self.assertEqual(fetch(self.url), {'rating': 1200})
+                decoded.assert_not_called()
+                self.assertEqual(self.seen_headers[-1]['If-None-Match'], '"v1"')
+                self.assertEqual(self.seen_headers[-1]['If-Modified-Since'], 'Mon, 01 Sep 2025 00:00:00 GMT')
+                self.assertGreater(self.cached()['fresh_until'], time.time())
+                self.assertEqual(self.cached()['etag'], '"v1"')
+
+    def test_fresh_entry_is_served_without_a_request(self):
+        self.store_stale()
+        self.serve(httpx.Response(304))
+        with self.stub.installed():
+            chesscom.get_json(self.url)
+            chesscom.get_json(self.url)
+        self.assertEqual(len(self.seen_headers), 1)
+
+    def test_changed_resource_replaces_the_entry(self):
+        self.store_stale()
+        self.serve(httpx.Response(200, json={'rating': 1300}, headers={'ETag': '"v2"'}))
+        with self.stub.installed():
+            self.assertEqual(chesscom.get_json(self.url), {'rating': 1300})
+        self.assertEqual((self.cached()['etag'], self.cached()['last_modified']), ('"v2"', None))
+
+    def test_first_request_is_unconditional(self):
+        self.serve(httpx.Response(200, json={'rating': 1300}, headers={'Last-Modified': 'Tue, 02 Sep 2025 00:00:00 GMT'}))
+        with self.stub.installed():
+            chesscom.get_json(self.url)
+        self.assertNotIn('If-None-Match', self.seen_headers[0])
+        self.assertNotIn('If-Modified-Since', self.seen_headers[0])
+        self.assertEqual(self.cached()['last_modified'], 'Tue, 02 Sep 2025 00:00:00 GMT')
+
+
+class StubChessComTests(SimpleTestCase):
+    def test_sync_calls_reuse_one_client_until_closed(self):
+        with patch.object(httpx, 'Client', wraps=httpx.Client) as opened:
+            with StubChessCom() as stub:
+                for name in ('alice', 'bob', 'carol'):
+                    self.assertEqual(stub.get(chesscom.stats_url(name)).status_code, 200)
+        self.assertEqual(opened.call_count, 1)
+        self.assertEqual(stub.calls, 3)
+        self.assertTrue(stub.client.is_closed)
+
+
+class PgnHeaderTests(SimpleTestCase):
+    def test_games_split_on_movetext_and_repeated_tags(self):
+        lines = [
+            '[Event "Club Open"]', '[White "Alice"]', '[Black "Bob"]', '[Result "1-0"]', '',
+            '1. e4 e5 2. Nf3 1-0',
+            # No blank line after the movetext.
+            '[Event "Club Open"]', '[White "Carol"]', '[Black "Dave"]', '[Result "*"]',
+            # A game with headers only: the repeated Event tag starts the next one.
+            '[Event "Blitz"]', '[White "Erin"]', '[Black "Frank"]',
+        ]
+        games = list(pgn.iter_headers(lines))
+        self.assertEqual([(g.event, g.white, g.black, g.result) for g in games], [
+            ('Club Open', 'Alice', 'Bob', '1-0'),
+            ('Club Open', 'Carol', 'Dave', '*'),
+            ('Blitz', 'Erin', 'Frank', ''),
+        ])
+
+    def test_escapes_crlf_and_malformed_tags(self):
+        lines = [
+            '[White "O\\"Neil, \\\\ Jr"]\r\n',
+            '[Black Bob]\r\n',  # unquoted value: ignored
+            '[Round "3.1"]\r\n',
+            '[Result "1/2-1/2"]\r\n',
+            '\r\n',
+            '1. d4 {[%clk 0:03:00]} d5 1/2-1/2\r\n',
+        ]
+        (game,) = pgn.iter_headers(lines)
+        self.assertEqual(game.white, 'O"Neil, \\ Jr')
+        self.assertEqual(game.black, '')
+        self.assertEqual(game.round, '3.1')
+        self.assertEqual(game.result, '1/2-1/2')
+
+    def test_link_falls_back_to_site(self):
+        linked = pgn.read_headers('[Site "Chess.com"]\n[Link "https://www.chess.com/game/live/1"]\n\n1. e4 *')
+        self.assertEqual(linked.link, 'https://www.chess.com/game/live/1')
+        self.assertEqual(pgn.read_headers('[Site "https://lichess.org/abc"]\n\n*').link, 'https://lichess.org/abc')
+
+    def test_archive_skips_games_without_pgn(self):
+        data = {'games': [{'pgn': '[White "a"]\n[Black "b"]\n\n1. e4 *'}, {'url': 'x'}, {'pgn': ''}]}
+        self.assertEqual([(g.white, g.black) for g in pgn.scan_archive(data)], [('a', 'b')])
+
+    def test_empty_input_yields_nothing(self):
+        self.assertEqual(list(pgn.iter_headers(['', '1. e4 e5 *', ''])), [])
+
+
+def month_url(chess_id, month):
+    return f'{settings.CHESSCOM_API_ROOT}/player/{chess_id}/games/{month}'
+
+
+def current_month():
+    now = timezone.now()
+    return f'{now.year}/{now.month:02d}'
+
+
+def opening_game(chess_id, opening, result='1-0'):
+    return {'pgn': f'[White "{chess_id}"]\n[Black "rival"]\n[Result "{result}"]\n'
+                   f'[ECOUrl "https://www.chess.com/openings/{opening}"]\n\n1. e4 e5 {result}'}
+
+
+class ArchiveServer:
+    """Serves monthly archives from ``months`` ("YYYY/MM" -> games) and records the months requested."""
+
+    def __init__(self, months, failing=()):
+        self.months = months
+        self.failing = set(failing)
+        self.requested = []
+
+    def __call__(self, request):
+        month = openings.archive_month(str(request.url))
+        self.requested.append(month)
+        if month in self.failing or month not in self.months:
+            return httpx.Response(503)
+        return httpx.Response(200, json={'games': self.months[month]})
+
+
+@override_settings(CHESSCOM_MAX_RETRIES=0)
+class OpeningIndexTestCase(TestCase):
+    def setUp(self):
+        for alias in ('chesscom', 'chesscom_archives'):
+            caches[alias].clear()
+        resilience._breakers.clear()
+        self.player = Player.objects.create(name='Alice', chess_id='alice', player_class='Beginner')
+        self.stub = StubChessCom()
+        self.addCleanup(self.stub.close)
+
+    def index(self, months, failing=()):
+        server = ArchiveServer(months, failing)
+        self.stub.handle = server
+        with self.stub.installed(), override_settings(CHESSCOM_RATE_LIMIT=0):
+            chesscom_async._limiter = None
+            openings.update_opening_index(self.player, [month_url('alice', month) for month in sorted(months)])
+        chesscom_async._limiter = None
+        return server.requested
+
+    def totals(self):
+        return dict(OpeningStat.objects.filter(player=self.player).values_list('opening', 'total'))
+
+    def cursor(self):
+        index = OpeningIndex.objects.get(player=self.player)
+        return index.archive, index.games_seen
+
+
+class ArchiveCacheTests(OpeningIndexTestCase):
+    def test_month_archives_have_their_own_bounded_cache(self):
+        closed = month_url('alice', '2020/01')
+        self.assertIs(chesscom.get_cache(closed), caches['chesscom_archives'])
+        self.assertIs(chesscom.get_cache(chesscom.stats_url('alice')), caches['chesscom'])
+        self.assertEqual(chesscom.ttl_for(closed), settings.CHESSCOM_CACHE_TTL['closed_month'])
+        self.assertIsNotNone(chesscom.ttl_for(closed))
+
+    def test_indexed_closed_months_leave_the_cache(self):
+        now = current_month()
+        self.index({
+            '2020/01': [opening_game('alice', 'Sicilian')],
+            '2020/02': [opening_game('alice', 'French')],
+            now: [opening_game('alice', 'Sicilian')],
+        })
+        archives = caches['chesscom_archives']
+        self.assertIsNone(archives.get(chesscom.cache_key(month_url('alice', '2020/01'))))
+        self.assertIsNone(archives.get(chesscom.cache_key(month_url('alice', '2020/02'))))
+        self.assertIsNotNone(archives.get(chesscom.cache_key(month_url('alice', now))))
+        self.assertEqual(self.cursor(), (now, 1))
+
+    def test_cursor_moves_past_a_closed_month(self):
+        self.index({'2020/11': [opening_game('alice', 'French')], '2020/12': [opening_game('alice', 'Sicilian')]})
+        self.assertEqual(self.cursor(), ('2021/01', 0))
+        self.assertEqual(self.index({'2020/11': [], '2020/12': [opening_game('alice', 'Sicilian')]}), [])
+        self.assertEqual(self.totals(), {'French': 1, 'Sicilian': 1})
+
+
+class OpeningIndexTests(OpeningIndexTestCase):
+    def test_months_before_the_cursor_are_never_fetched(self):
+        now = current_month()
+        OpeningIndex.objects.create(player=self.player, archive=now, games_seen=0)
+        requested = self.index({'2020/01': [opening_game('alice', 'French')], now: [opening_game('alice', 'Sicilian')]})
+        self.assertEqual(requested, [now])
+        self.assertEqual(self.totals(), {'Sicilian': 1})
+
+    def test_only_games_after_games_seen_count_in_the_cursor_month(self):
+        now = current_month()
+        OpeningIndex.objects.create(player=self.player, archive=now, games_seen=2)
+        self.index({now: [opening_game('alice', 'French'), opening_game('alice', 'French'),
+                          opening_game('alice', 'Sicilian', '0-1'), opening_game('alice', 'Sicilian', '1/2-1/2')]})
+        stat = OpeningStat.objects.get(player=self.player)
+        self.assertEqual((stat.opening, stat.total, stat.win, stat.loss, stat.draw), ('Sicilian', 2, 0, 1, 1))
+        self.assertEqual(self.cursor(), (now, 4))
+
+    def test_failed_month_stops_the_cursor_before_it(self):
+        now = current_month()
+        OpeningIndex.objects.create(player=self.player, archive='2020/01', games_seen=1)
+        months = {
+            '2020/01': [opening_game('alice', 'French'), opening_game('alice', 'Caro Kann')],
+            '2020/02': [opening_game('alice', 'Sicilian')],
+            now: [opening_game('alice', 'Dutch')],
+        }
+        self.index(months, failing={'2020/02'})
+        self.assertEqual(self.totals(), {'Caro Kann': 1})
+        self.assertEqual(self.cursor(), ('2020/02', 0))
+
+        # Once the month is back, the index picks up exactly where it stopped.
+        self.index(months)
+        self.assertEqual(self.totals(), {'Caro Kann': 1, 'Sicilian': 1, 'Dutch': 1})
+        self.assertEqual(self.cursor(), (now, 1))
+
+    @patch.object(openings, 'INITIAL_GAMES', 5)
+    @override_settings(CHESSCOM_CONCURRENCY=2)
+    def test_first_build_reads_the_newest_months_covering_initial_games(self):
+        now = current_month()
+        months = {
+            '2019/12': [opening_game('alice', 'French')] * 4,
+            '2020/01': [opening_game('alice', 'French')] * 4,
+            '2020/02': [opening_game('alice', 'Dutch')] * 2,
+            '2020/03': [opening_game('alice', 'Sicilian')] * 2,
+            now: [opening_game('alice', 'Sicilian')],
+        }
+        requested = self.index(months)
+        # Months are fetched newest first, two at a time; 1 + 2 + 2 games reach
+        # INITIAL_GAMES, so 2020/01 is fetched with 2020/02 but not counted.
+        self.assertCountEqual(requested, [now, '2020/03', '2020/02', '2020/01'])
+        self.assertEqual(self.totals(), {'Sicilian': 3, 'Dutch': 2})
+        self.assertEqual(self.cursor(), (now, 1))
+
+    def test_first_build_without_any_games_leaves_no_cursor(self):
+        self.index({}, failing={current_month()})
+        self.assertEqual(self.cursor(), ('', 0))
@@ -1,7 +1,8 @@
-from .views import get_players,fetch_statistics
+from .views import chesscom_status, get_players,fetch_statistics
 from django.urls import path
 
 urlpatterns = [
     path('details/', get_players,), 
-    path('details/<int:player_id>', fetch_statistics) 
+    path('details/<int:player_id>', fetch_statistics),
+    path('chesscom/status/', chesscom_status),
 ]
\ No newline at end of file
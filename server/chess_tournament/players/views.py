@@ -1,15 +1,22 @@
+import json
+import os
+import time
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from itertools import islice
+from django.conf import settings
+from django.db.models import Q, QuerySet
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from .models import Player
-from leaderboard.models import Tournament
 from featured_games.models import Game
-from django.db.models import Q
-import chess.pgn
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import io
-import cloudscraper
-
-scraper = cloudscraper.create_scraper()
+from featured_games.queries import recent_player_games
+from chess_tournament.instrumentation import span
+from . import chesscom
+from .openings import favorite_openings, update_opening_index
+from .resilience import breaker_stats
+from .stats import ensure_stats
 
 
 def format_record(record):
@@ -30,60 +37,39 @@ def format_record(record):
     }
 
 
-def fetch_tournaments(player_id):
-    return list(
-        Tournament.objects
-        .filter(game__in=Game.objects.filter(Q(ply1=player_id) | Q(ply2=player_id)))
-        .values_list("name", flat=True)
-        .distinct()
-    )
-
+def fetch_tournaments(player_ids):
+    """Map each player id to the names of tournaments they played in, in two queries."""
+    tournaments = {player_id: [] for player_id in player_ids}
+    for field in ("ply1_id", "ply2_id"):
+        rows = (
+            Game.objects
+            .filter(**{f"{field}__in": player_ids}, tournament__isnull=False)
+            .values_list(field, "tournament__name")
+            .distinct()
+        )
+        for player_id, name in rows:
+            if name not in tournaments[player_id]:
+                tournaments[player_id].append(name)
+    return tournaments
 
-def fetch_details(player_id):
-    url = f"https://api.chess.com/pub/player/{player_id}/stats"
-    response = scraper.get(url)
-    stats = {"performance": {}}
-    constant = {"win": 0, "loss": 0, "draw": 0}
-    constant2=format_record(constant)
 
-    if response.status_code != 200:
+def fetch_details(player):
+    stats = getattr(player, "chess_stats", None)
+    if stats is None:
+        constant2 = format_record({"win": 0, "loss": 0, "draw": 0})
         return 0, 0, 0, 0, {"bullet": constant2, "rapid": constant2, "blitz": constant2}
 
-    data = response.json()
-    bullet = data.get("chess_bullet", {}).get("record", constant)
-    rapid = data.get("chess_rapid", {})
-    blitz = data.get("chess_blitz", {}).get("record", constant)
-
-    stats["performance"] = {
-        "bullet": format_record(bullet),
-        "rapid": format_record(rapid.get("record", constant)),
-        "blitz": format_record(blitz),
+    performance = {
+        "bullet": format_record(stats.record("bullet")),
+        "rapid": format_record(stats.record("rapid")),
+        "blitz": format_record(stats.record("blitz")),
     }
-
-    # Prefer rapid rating, but fall back to other available Chess.com ratings
-    # so players without rapid history do not incorrectly appear as 0.
-    rating_candidates = [
-        rapid.get("last", {}).get("rating", 0),
-        data.get("chess_bullet", {}).get("last", {}).get("rating", 0),
-        data.get("chess_blitz", {}).get("last", {}).get("rating", 0),
-    ]
-    rating = next((value for value in rating_candidates if value), 0)
-
-    rapid_record = rapid.get("record", {})
-    wins = rapid_record.get("win", 0)
-    losses = rapid_record.get("loss", 0)
-    draws = rapid_record.get("draw", 0)
-
-    return rating, wins, losses, draws, stats["performance"]
+    return stats.rating, stats.rapid_win, stats.rapid_loss, stats.rapid_draw, performance
 
 
 def fetch_games(player):
     player_id = player.id if hasattr(player, "id") else player
-    games = (
-        Game.objects.filter(Q(ply1=player_id) | Q(ply2=player_id))
-        .select_related("ply1", "ply2", "tournament")
-        .order_by("-id")[:6]
-    )
+    games = recent_player_games(player_id, 6)
 
     recent_games = []
     for game in games:
@@ -117,79 +103,41 @@ def fetch_games(player):
 
 
 def fetch_achievements(player):
-    tournament1 = Tournament.objects.filter(Q(winner1=player))
-    tournament2 = Tournament.objects.filter(Q(winner2=player))
-    tournament3 = Tournament.objects.filter(Q(winner3=player))
+    # Relies on first_place/second_place/third_place being prefetched.
     result = []
-    for t in tournament1:
+    for t in player.first_place.all():
         result.append(f"Champion of {t}")
-    for t in tournament2:
+    for t in player.second_place.all():
         result.append(f"Runner-up of {t}")
-    for t in tournament3:
+    for t in player.third_place.all():
         result.append(f"Second runner-up of {t}")
     return result
 
 
 def get_games_url(player_id):
-    url = f"https://api.chess.com/pub/player/{player_id}/games/archives"
-    
-    response = scraper.get(url)
-    if response.status_code == 200:
-        return response.json().get("archives", [])
+    data = chesscom.get_json(chesscom.archives_url(player_id))
+    if data is not None:
+        return data.get("archives", [])
     return []
 
 
-def calculate_favorite(openings):
-    top = sorted(openings.items(), key=lambda x: x[1]["total"], reverse=True)[:5]
+def calculate_favorite(stats):
     return [
         {
-            "name": name,
-            "games": stat["total"],
-            "winRate": round((stat["win"] / stat["total"] * 100), 2) if stat["total"] else 0
+            "name": stat.opening,
+            "games": stat.total,
+            "winRate": round((stat.win / stat.total * 100), 2) if stat.total else 0
         }
-        for name, stat in top
+        for stat in stats
     ]
 
 
-def fetch_openings(player_id, urls):
-    count = 0
-    openings = {}
-    for url in reversed(urls):
-        if count >= 250:
-            break
-        response = scraper.get(url)
-        if response.status_code != 200:
-            continue
-        games = response.json().get("games", [])
-        for g in games:
-            if count >= 250:
-                break
-            game = chess.pgn.read_game(io.StringIO(g.get("pgn", "")))
-            if not game:
-                continue
-            eco_url = game.headers.get("ECOUrl", "").split("/")[-1].replace("-", " ")
-            if not eco_url:
-                continue
-            opening = eco_url.strip()
-            if opening not in openings:
-                openings[opening] = {"win": 0, "loss": 0, "draw": 0, "total": 0}
-            result = game.headers.get("Result", "")
-            player_color = "White" if game.headers.get("White", "").lower() == player_id.lower() else "Black"
-            if result == "1-0":
-                if player_color == "White":
-                    openings[opening]["win"] += 1
-                else:
-                    openings[opening]["loss"] += 1
-            elif result == "0-1":
-                if player_color == "Black":
-                    openings[opening]["win"] += 1
-                else:
-                    openings[opening]["loss"] += 1
-            elif result == "1/2-1/2":
-                openings[opening]["draw"] += 1
-            openings[opening]["total"] += 1
-            count += 1
-    return calculate_favorite(openings)
+def fetch_openings(player):
+    with span("openings"):
+        urls = get_games_url(player.chess_id)
+        if urls:
+            update_opening_index(player, urls, timeout=settings.CHESSCOM_ARCHIVE_DEADLINE)
+        return calculate_favorite(favorite_openings(player))
 
 
 @api_view(['GET'])
@@ -200,47 +148,242 @@ def fetch_statistics(request, player_id):
         return Response({"openings": [], "yearlyRating": [], "recentGames": []})
     
     recent_games = fetch_games(player.id)
-    urls = get_games_url(player.chess_id)
-
-    if not urls:
-        return Response({"openings": [], "yearlyRating": [], "recentGames": recent_games})
-    
-    openings = fetch_openings(player.chess_id, urls)
+    openings = fetch_openings(player)
     return Response({"openings": openings, "yearlyRating": [], "recentGames": recent_games})
 
 
-@api_view(['GET'])
-def get_players(request):
-    players = Player.objects.all()
-    result = []
+ROSTER_FIELDS = (
+    "id", "name", "bio", "title", "country", "age", "trend", "rating",
+    "wins", "losses", "draws", "performance", "achievements", "tournaments", "stats",
+)
+# Fields that need the player's Chess.com stats.
+STATS_DEPENDENT = {"trend", "rating", "wins", "losses", "draws", "performance", "stats"}
+SORT_KEYS = {"id": "id", "rating": "sort_rating", "name": "name", "player_class": "player_class"}
+CURSOR_TYPES = {"id": (int,), "rating": (int, float), "name": (str,), "player_class": (str,)}
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+STREAM_CHUNK_SIZE = 500  # players per chunk when the whole roster is streamed
+
+
+def parse_fields(value):
+    if not value:
+        return set(ROSTER_FIELDS)
+    fields = {field.strip() for field in value.split(",") if field.strip()}
+    unknown = fields - set(ROSTER_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return fields
+
+
+def stats_fields():
+    """Roster fields that need Chess.com stats under the current RATING_SOURCE."""
+    if settings.RATING_SOURCE == "local":
+        return STATS_DEPENDENT - {"rating"}
+    return STATS_DEPENDENT
+
+
+def local_rating(player):
+    rating = getattr(player, "local_rating", None)
+    return round(rating.rating) if rating is not None else 0
+
+
+def encode_cursor(player, key):
+    value = getattr(player, SORT_KEYS[key])
+    return urlsafe_b64encode(json.dumps([key, value, player.id]).encode()).decode()
 
-    def fetch_player_data(player):
-        rating, wins, losses, draws, performance = fetch_details(player.chess_id)
-        return {
-            "id": player.id,
-            "name": player.name,
-            "bio": player.bio,
-            "title": player.player_class,
-            "country": "India",
-            "age": None,
+
+def decode_cursor(cursor, key):
+    decoded = json.loads(urlsafe_b64decode(cursor.encode()))
+    if not isinstance(decoded, list) or len(decoded) != 3:
+        raise ValueError("malformed cursor")
+    cursor_key, value, player_id = decoded
+    if cursor_key != key:
+        raise ValueError("cursor was issued for a different sort")
+    # The value is used as a filter, so it must have the sort column's type.
+    if not is_instance(value, CURSOR_TYPES[key]) or not is_instance(player_id, (int,)):
+        raise ValueError("malformed cursor")
+    return value, player_id
+
+
+def is_instance(value, types):
+    return isinstance(value, types) and not isinstance(value, bool)
+
+
+def parse_sort(value):
+    descending = value.startswith("-")
+    key = value.removeprefix("-")
+    if key not in SORT_KEYS:
+        raise ValueError(f"sort must be one of: {', '.join(SORT_KEYS)}")
+    return key, descending
+
+
+def parse_page(params, key):
+    """Return (limit, offset, cursor), or None when no paging was asked for."""
+    if not {"limit", "offset", "cursor"} & params.keys():
+        return None
+    try:
+        limit = max(1, min(int(params.get("limit", DEFAULT_LIMIT)), MAX_LIMIT))
+        offset = max(0, int(params.get("offset", 0)))
+    except ValueError:
+        raise ValueError("limit and offset must be integers")
+    cursor = params.get("cursor") or None
+    if cursor:
+        try:
+            cursor = decode_cursor(cursor, key)
+        except (ValueError, TypeError, UnicodeDecodeError):
+            raise ValueError("Invalid cursor")
+    return limit, offset, cursor
+
+
+def sorted_players(key, descending, player_class=None, cursor=None):
+    """Players in a stable order: the sort key, then id in the same direction."""
+    column = SORT_KEYS[key]
+    if settings.RATING_SOURCE == "local":
+        players = Player.objects.annotate(sort_rating=Coalesce("local_rating__rating", 0.0))
+    else:
+        players = Player.objects.annotate(sort_rating=Coalesce("chess_stats__rating", 0))
+    if player_class:
+        players = players.filter(player_class=player_class)
+    if cursor is not None:
+        value, player_id = cursor
+        after = "lt" if descending else "gt"
+        if column == "id":
+            players = players.filter(**{f"id__{after}": player_id})
+        else:
+            players = players.filter(
+                Q(**{f"{column}__{after}": value}) | Q(**{column: value, f"id__{after}": player_id})
+            )
+    order = [column, "id"] if column != "id" else ["id"]
+    return players.order_by(*(f"-{name}" if descending else name for name in order))
+
+
+def roster_queryset(fields, players):
+    if fields & stats_fields():
+        players = players.select_related("chess_stats")
+    if "rating" in fields and settings.RATING_SOURCE == "local":
+        players = players.select_related("local_rating")
+    if "achievements" in fields:
+        players = players.prefetch_related("first_place", "second_place", "third_place")
+    return players
+
+
+def player_data(player, fields, tournaments):
+    data = {
+        "id": player.id,
+        "name": player.name,
+        "bio": player.bio,
+        "title": player.player_class,
+        "country": "India",
+        "age": None,
+    }
+    if fields & stats_fields():
+        rating, wins, losses, draws, performance = fetch_details(player)
+        data.update({
             "trend": "up" if wins > losses else "down",
             "rating": rating,
             "wins": wins,
             "losses": losses,
             "draws": draws,
             "performance": f"+{wins - losses}" if wins > losses else f"-{losses - wins}",
-            "achievements": fetch_achievements(player.id),
-            "tournaments": fetch_tournaments(player.id),
             "stats": {
                 "yearlyRating": [],
                 "openings": [],
                 "performance": performance
-            }
-        }
+            },
+        })
+    if "rating" in fields and settings.RATING_SOURCE == "local":
+        data["rating"] = local_rating(player)
+    if "achievements" in fields:
+        data["achievements"] = fetch_achievements(player)
+    if "tournaments" in fields:
+        data["tournaments"] = tournaments[player.id]
+    return {field: data[field] for field in ROSTER_FIELDS if field in fields}
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def build_roster(players, fields, chunk_size=None):
+    """Roster entries for ``players``, built ``chunk_size`` players at a time.
+
+    Each chunk loads its stats, achievements and tournaments in a fixed
+    number of queries, so streamed entries start before later players are
+    read. Every chunk shares one CHESSCOM_REQUEST_DEADLINE for missing
+    stats. Without ``chunk_size`` all players form a single chunk.
+    """
+    if chunk_size is None:
+        players = [list(players)]
+    else:
+        if isinstance(players, QuerySet):
+            players = players.iterator(chunk_size=chunk_size)
+        players = chunked(players, chunk_size)
+    deadline = time.monotonic() + settings.CHESSCOM_REQUEST_DEADLINE
+    for chunk in players:
+        if fields & stats_fields():
+            chunk = ensure_stats(chunk, deadline=max(deadline - time.monotonic(), 0))
+        tournaments = fetch_tournaments([player.id for player in chunk]) if "tournaments" in fields else {}
+        for player in chunk:
+            yield player_data(player, fields, tournaments)
+
+
+def stream_ndjson(entries):
+    for entry in entries:
+        yield json.dumps(entry) + "\n"
+
+
+def stream_json_array(entries):
+    yield "["
+    for index, entry in enumerate(entries):
+        yield ("," if index else "") + json.dumps(entry)
+    yield "]"
+
+
+@api_view(['GET'])
+def get_players(request):
+    try:
+        fields = parse_fields(request.query_params.get("fields"))
+    except ValueError as error:
+        return Response({"error": str(error)}, status=400)
+    stream = request.query_params.get("stream")
+    if stream not in (None, "ndjson", "json"):
+        return Response({"error": "stream must be 'ndjson' or 'json'"}, status=400)
+    try:
+        key, descending = parse_sort(request.query_params.get("sort", "id"))
+        page = parse_page(request.query_params, key)
+    except ValueError as error:
+        return Response({"error": str(error)}, status=400)
+
+    cursor = page[2] if page else None
+    players = sorted_players(key, descending, request.query_params.get("player_class"), cursor)
+    if page is not None:
+        # Fetch one extra row to know whether there is a next page; only the
+        # page itself is built, so Chess.com is only consulted for it.
+        limit, offset, _ = page
+        rows = list(roster_queryset(fields, players)[offset:offset + limit + 1])
+        next_cursor = encode_cursor(rows[limit - 1], key) if len(rows) > limit else None
+        entries = build_roster(rows[:limit], fields)
+        if stream is None:
+            return Response({"players": list(entries), "next_cursor": next_cursor})
+        response_headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    else:
+        chunk_size = STREAM_CHUNK_SIZE if stream else None
+        entries = build_roster(roster_queryset(fields, players), fields, chunk_size)
+        response_headers = {}
+    if stream == "ndjson":
+        return StreamingHttpResponse(
+            stream_ndjson(entries), content_type="application/x-ndjson", headers=response_headers
+        )
+    if stream == "json":
+        return StreamingHttpResponse(
+            stream_json_array(entries), content_type="application/json", headers=response_headers
+        )
+    return Response(list(entries))
 
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        futures = [executor.submit(fetch_player_data, p) for p in players]
-        for future in as_completed(futures):
-            result.append(future.result())
 
-    return Response(result)
+@api_view(['GET'])
+def chesscom_status(request):
+    """Circuit breaker state and transition counts for Chess.com, as seen by this worker process."""
+    return Response({"pid": os.getpid(), "breakers": breaker_stats()})